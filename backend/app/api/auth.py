@@ -10,7 +10,7 @@ from app.db.session import get_db
 from app.core import security
 from app.core.config import settings
 from app.models.user import User
-from app.schemas.auth import Token, UserCreate, UserLogin, UserResponse, TokenData
+from app.schemas.auth import Token, UserCreate, UserLogin, UserResponse, UserUpdate, TokenData
 
 router = APIRouter()
 
@@ -73,3 +73,18 @@ async def login(user_in: UserLogin, db: AsyncSession = Depends(get_db)) -> Any:
 @router.get("/me", response_model=UserResponse)
 async def read_users_me(current_user: User = Depends(get_current_user)) -> Any:
     return current_user
+
+@router.patch("/me", response_model=UserResponse)
+async def update_users_me(
+    user_in: UserUpdate,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+) -> Any:
+    if user_in.full_name is not None:
+        current_user.full_name = user_in.full_name
+    if user_in.generation_cache_enabled is not None:
+        current_user.generation_cache_enabled = user_in.generation_cache_enabled
+
+    await db.commit()
+    await db.refresh(current_user)
+    return current_user
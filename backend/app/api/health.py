@@ -0,0 +1,41 @@
+from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+
+from app.services import llm_service
+from app.services.generation_cache import generation_cache
+from app.services.manifestation_service import generation_flight, index_flight
+from app.services.tts_service import tts_service
+from app.services.vector_store import vector_store_status, vector_store_stats
+from app.utils.prompt_builder import PROMPT_VERSION
+from app.workers.generation_worker import job_workers
+
+router = APIRouter()
+
+@router.get("/ready")
+async def get_readiness():
+    """
+    200 once the shared vector store (embedding model + Qdrant) is loaded,
+    503 while warm-up is still running or after it failed.
+    """
+    vector_store = vector_store_status()
+    ready = vector_store["ready"]
+    return JSONResponse(
+        status_code=200 if ready else 503,
+        content={"status": "ready" if ready else "starting", "vector_store": vector_store}
+    )
+
+@router.get("/metrics")
+async def get_metrics():
+    return {
+        "prompt_version": PROMPT_VERSION,
+        "llm_backend": llm_service.backend.name,
+        "llm_admission": llm_service.admission.stats(),
+        "llm_breaker": llm_service.breaker.stats(),
+        "llm_hedging": dict(llm_service.hedge_stats, deadline_s=llm_service.hedge_delay()),
+        "generation_cache": generation_cache.stats(),
+        "generation_flight": generation_flight.stats(),
+        "index_flight": index_flight.stats(),
+        "vector_store": vector_store_stats(),
+        "tts": tts_service.stats(),
+        "job_workers": job_workers.stats(),
+    }
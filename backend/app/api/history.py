@@ -9,6 +9,7 @@ from app.api import auth
 from app.models.user import User
 from app.models.manifestation import Manifestation
 from app.schemas.manifestation import ManifestationResponse
+from app.services.tts_service import tts_service
 
 router = APIRouter()
 
@@ -43,7 +44,8 @@ async def get_history(
             manifestation_text=m.manifestation_text, # Just return full for now or modify schema
             created_at=m.created_at.isoformat(),
             tokens_used=0, # Not joined
-            cost=0.0       # Not joined
+            cost=0.0,      # Not joined
+            voice_available=tts_service.has_audio(m.manifestation_text)
         ) for m in manifestations
     ]
 
@@ -68,5 +70,6 @@ async def get_history_detail(
         manifestation_text=manifestation.manifestation_text,
         created_at=manifestation.created_at.isoformat(),
         tokens_used=0, 
-        cost=0.0
+        cost=0.0,
+        voice_available=tts_service.has_audio(manifestation.manifestation_text)
     )
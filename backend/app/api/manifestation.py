@@ -1,101 +1,393 @@
+import json
 import time
 import asyncio
-from fastapi import APIRouter, Depends, HTTPException
+import base64
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import JSONResponse, StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from starlette.concurrency import run_in_threadpool
 
-from app.db.session import get_db
+from app.db.session import get_db, SessionLocal
 from app.api import auth
 from app.models.user import User
-from app.models.manifestation import Manifestation
-from app.models.usage import Usage
-from app.schemas.manifestation import ManifestationCreate, ManifestationResponse
+from app.core.config import settings
+from app.schemas.job import JobResponse
+from app.schemas.manifestation import ManifestationCreate, ManifestationBatchCreate, ManifestationResponse
+from app.services import job_service
 from app.services import llm_service
-from app.services.vector_store import VectorStore
-from app.utils.cost_tracker import CostTracker
+from app.services.tts_service import tts_service
+from app.services.manifestation_service import (
+    build_profile,
+    generate_text,
+    get_cached_text,
+    cache_text,
+    save_manifestation,
+    save_manifestations,
+    index_manifestation,
+    index_manifestations,
+)
+from app.services.vector_store import AsyncVectorStore, get_vector_store
+from app.utils.admission import QueueFullError, PRIORITY_INTERACTIVE, PRIORITY_BATCH
+from app.workers.generation_worker import job_workers
+from app.utils.circuit_breaker import CircuitOpenError
 
 router = APIRouter()
-vector_store = VectorStore()
 
-@router.post("/generate", response_model=ManifestationResponse)
+def _busy(e) -> HTTPException:
+    # QueueFullError / CircuitOpenError both carry a retry_after hint
+    return HTTPException(
+        status_code=503,
+        detail=str(e),
+        headers={"Retry-After": str(e.retry_after)}
+    )
+
+def _sse(data: dict, event: str = None) -> str:
+    message = f"event: {event}\n" if event else ""
+    return message + f"data: {json.dumps(data)}\n\n"
+
+@router.post(
+    "/generate",
+    response_model=ManifestationResponse,
+    responses={202: {"model": JobResponse, "description": "Queued as a background job (async_job=true)"}}
+)
 async def generate_manifestation_endpoint(
     request: ManifestationCreate,
+    async_job: bool = Query(False, description="Return a job ID immediately instead of waiting"),
     current_user: User = Depends(auth.get_current_user),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_db),
+    vector_store: AsyncVectorStore = Depends(get_vector_store)
 ):
+    if async_job:
+        job = await job_service.enqueue_job(db, current_user.id, request, priority=PRIORITY_INTERACTIVE)
+        job_workers.notify()
+        return JSONResponse(status_code=202, content=job_service.to_response(job).model_dump())
+
     start_time = time.time()
 
     # 1. Prepare Profile
-    # Map request fields to what prompt builder expects
-    profile = {
-        "preferred_name": request.preferred_name,
-        "birth_date": request.birth_date or "Unknown",
-        "birth_time": request.birth_time or "Unknown",
-        "birth_place": request.birth_place or "Unknown",
-        "nakshatra": request.nakshatra,
-        "lagna": request.lagna,
-        "star_sign": request.star_sign,
-        "strengths": request.strengths,
-        "areas_of_improvement": request.challenges, # Mapping challenges
-        "greatest_achievement": request.greatest_achievement or "Unknown",
-        "recent_achievement": request.recent_achievement or "Unknown",
-        "next_year_goals": request.next_year_goals or "Unknown",
-        "life_goals": request.life_goals,
-        "legacy": request.legacy or "Unknown",
-        "manifestation_focus": request.desired_mindset # Mapping mindset
-    }
-
-    # 2. Call LLM (Blocking call run in threadpool)
+    profile = build_profile(request)
+
+    # 2. Call LLM (async, shared connection pool) unless the profile is cached
     try:
-        manifestation_text = await run_in_threadpool(
-            llm_service.generate_manifestation, 
-            profile
-        )
+        manifestation_text, cache_hit = await generate_text(db, current_user, profile)
+    except (QueueFullError, CircuitOpenError) as e:
+        raise _busy(e)
+    except llm_service.UpstreamError as e:
+        raise HTTPException(status_code=502, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
     duration_ms = (time.time() - start_time) * 1000
 
-    # 3. Usage & Cost
-    tokens = CostTracker.estimate_tokens(manifestation_text)
-    cost = CostTracker.calculate_cost(tokens)
-
-    # 4. Store in DB
-    db_manifestation = Manifestation(
-        user_id=current_user.id,
-        manifestation_text=manifestation_text
-    )
-    db.add(db_manifestation)
-    
-    # usage tracking
-    db_usage = Usage(
-        user_id=current_user.id,
+    # 3. Usage & Cost, 4. Store in DB
+    db_manifestation, tokens, cost = await save_manifestation(
+        db,
+        current_user.id,
+        manifestation_text,
         endpoint="/manifestation/generate",
-        tokens_used=tokens,
-        cost=cost,
-        duration_ms=duration_ms
-    )
-    db.add(db_usage)
-    
-    await db.commit()
-    await db.refresh(db_manifestation)
-
-    # 5. Store in Vector DB (Background task or await/threadpool)
-    # Using run_in_threadpool because vector store uses sync client
-    metadata = {
-        "user_id": current_user.id,
-        "manifestation_id": db_manifestation.id
-    }
-    await run_in_threadpool(
-        vector_store.store_manifestation, 
-        manifestation_text, 
-        metadata
+        duration_ms=duration_ms,
+        cache_hit=cache_hit
     )
 
+    # 5. Store in Vector DB
+    await index_manifestation(vector_store, current_user.id, db_manifestation.id, manifestation_text)
+
     return ManifestationResponse(
         id=db_manifestation.id,
         manifestation_text=manifestation_text,
         created_at=db_manifestation.created_at.isoformat(),
         tokens_used=tokens,
-        cost=cost
+        cost=cost,
+        cached=cache_hit
+    )
+
+@router.post("/generate/stream")
+async def stream_manifestation_endpoint(
+    request: ManifestationCreate,
+    current_user: User = Depends(auth.get_current_user),
+    vector_store: AsyncVectorStore = Depends(get_vector_store)
+):
+    """
+    Server-Sent Events variant of /generate.
+    Emits `data: {"delta": ...}` per token, then an `event: done` carrying the
+    ManifestationResponse once the passage is persisted and indexed.
+    """
+    profile = build_profile(request)
+    user_id = current_user.id
+
+    # Reject before the 200 stream starts; once streaming, errors become SSE events
+    try:
+        llm_service.breaker.ensure_closed()
+        llm_service.admission.ensure_capacity()
+    except (QueueFullError, CircuitOpenError) as e:
+        raise _busy(e)
+
+    async def event_stream():
+        start_time = time.time()
+
+        # Request-scoped session is already closed once the response starts streaming
+        async with SessionLocal() as db:
+            manifestation_text = await get_cached_text(db, current_user, profile)
+            cache_hit = manifestation_text is not None
+
+            if cache_hit:
+                yield _sse({"delta": manifestation_text})
+            else:
+                parts = []
+                try:
+                    async for delta in llm_service.stream_manifestation(profile):
+                        parts.append(delta)
+                        yield _sse({"delta": delta})
+                except Exception as e:
+                    yield _sse({"detail": str(e)}, event="error")
+                    return
+
+                manifestation_text = " ".join("".join(parts).split())
+                await cache_text(current_user, profile, manifestation_text)
+
+            duration_ms = (time.time() - start_time) * 1000
+
+            db_manifestation, tokens, cost = await save_manifestation(
+                db,
+                user_id,
+                manifestation_text,
+                endpoint="/manifestation/generate/stream",
+                duration_ms=duration_ms,
+                cache_hit=cache_hit
+            )
+
+        await index_manifestation(vector_store, user_id, db_manifestation.id, manifestation_text)
+
+        response = ManifestationResponse(
+            id=db_manifestation.id,
+            manifestation_text=manifestation_text,
+            created_at=db_manifestation.created_at.isoformat(),
+            tokens_used=tokens,
+            cost=cost,
+            cached=cache_hit
+        )
+        yield _sse(response.model_dump(), event="done")
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+async def _replay(text: str):
+    yield text
+
+@router.post("/generate/speak")
+async def speak_manifestation_endpoint(
+    request: ManifestationCreate,
+    accent: str = Query("indian_english", description="Voice accent, as in /voice/generate"),
+    current_user: User = Depends(auth.get_current_user),
+    vector_store: AsyncVectorStore = Depends(get_vector_store)
+):
+    """
+    /generate/stream with voice: the passage is spoken while it is written.
+    Each sentence goes to TTS as soon as the LLM completes it, so the first
+    audio arrives seconds in instead of after the whole passage and MP3.
+    Emits `data: {"delta": ...}` per token, `event: audio` with
+    {"index", "text", "audio"} per sentence in order (base64 MP3 frames that
+    play back-to-back), then `event: done` carrying the ManifestationResponse
+    plus `audio_url` of the full recording, which /voice serves from cache.
+    """
+    profile = build_profile(request)
+    user_id = current_user.id
+
+    try:
+        llm_service.breaker.ensure_closed()
+        llm_service.admission.ensure_capacity()
+    except (QueueFullError, CircuitOpenError) as e:
+        raise _busy(e)
+
+    async def event_stream():
+        start_time = time.time()
+
+        async with SessionLocal() as db:
+            manifestation_text = await get_cached_text(db, current_user, profile)
+            cache_hit = manifestation_text is not None
+            audio_url = tts_service.cached_audio_url(manifestation_text, accent) if cache_hit else None
+
+            if audio_url:
+                # Same passage already spoken in this voice: nothing to synthesize
+                yield _sse({"delta": manifestation_text})
+            else:
+                deltas = _replay(manifestation_text) if cache_hit else llm_service.stream_manifestation(profile)
+                try:
+                    async for kind, payload in tts_service.speak(deltas, accent):
+                        if kind == "delta":
+                            yield _sse({"delta": payload})
+                        elif kind == "audio":
+                            index, sentence, audio = payload
+                            yield _sse({
+                                "index": index,
+                                "text": sentence,
+                                "audio": base64.b64encode(audio).decode("ascii")
+                            }, event="audio")
+                        else:
+                            text, audio = payload
+                except Exception as e:
+                    yield _sse({"detail": str(e)}, event="error")
+                    return
+
+                if not cache_hit:
+                    manifestation_text = " ".join(text.split())
+                    await cache_text(current_user, profile, manifestation_text)
+                audio_url = tts_service.store_audio(manifestation_text, accent, audio)
+
+            duration_ms = (time.time() - start_time) * 1000
+
+            db_manifestation, tokens, cost = await save_manifestation(
+                db,
+                user_id,
+                manifestation_text,
+                endpoint="/manifestation/generate/speak",
+                duration_ms=duration_ms,
+                cache_hit=cache_hit
+            )
+
+        await index_manifestation(vector_store, user_id, db_manifestation.id, manifestation_text)
+
+        response = ManifestationResponse(
+            id=db_manifestation.id,
+            manifestation_text=manifestation_text,
+            created_at=db_manifestation.created_at.isoformat(),
+            tokens_used=tokens,
+            cost=cost,
+            cached=cache_hit,
+            voice_available=True
+        )
+        yield _sse({**response.model_dump(), "audio_url": audio_url}, event="done")
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
     )
+
+@router.post("/batch")
+async def batch_generate_endpoint(
+    request: ManifestationBatchCreate,
+    current_user: User = Depends(auth.get_current_user),
+    vector_store: AsyncVectorStore = Depends(get_vector_store)
+):
+    """
+    Generates passages for many profiles in one call.
+    Items are generated concurrently (BATCH_CONCURRENCY, batch priority) and
+    written in groups of BATCH_FLUSH_SIZE: one DB transaction and one vector
+    upsert per group. Results stream back as NDJSON, one line per item:
+    {"index": i, "status": "ok", ...ManifestationResponse} or
+    {"index": i, "status": "error", "detail": ...}. Items that were saved but
+    could not be indexed are "ok" with a "warning"; retrying them would
+    create duplicates.
+    """
+    if not request.items:
+        raise HTTPException(status_code=400, detail="At least one item is required.")
+    if len(request.items) > settings.BATCH_MAX_ITEMS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Too many items: at most {settings.BATCH_MAX_ITEMS} per batch."
+        )
+
+    profiles = [build_profile(item) for item in request.items]
+    user_id = current_user.id
+    semaphore = asyncio.Semaphore(settings.BATCH_CONCURRENCY)
+
+    async def generate_item(index: int, profile: dict):
+        async with semaphore:
+            start_time = time.time()
+            try:
+                # db=None: tasks run concurrently and cannot share one session
+                text, cache_hit = await generate_text(None, current_user, profile, priority=PRIORITY_BATCH)
+            except Exception as e:
+                return index, None, str(e)
+            return index, (text, (time.time() - start_time) * 1000, cache_hit), None
+
+    async def flush(db: AsyncSession, pending: list) -> list:
+        try:
+            return await write_group(db, pending)
+        except Exception as e:
+            await db.rollback()
+            return [
+                json.dumps({"index": index, "status": "error", "detail": str(e)}) + "\n"
+                for index, _ in pending
+            ]
+
+    async def write_group(db: AsyncSession, pending: list) -> list:
+        saved = await save_manifestations(
+            db,
+            user_id,
+            [result for _, result in pending],
+            endpoint="/manifestation/batch"
+        )
+        # Rows are committed by now: an indexing failure must not turn them into
+        # errors, or a client retrying those items would create duplicates
+        warning = None
+        try:
+            await index_manifestations(
+                vector_store,
+                user_id,
+                [(manifestation_id, result[0]) for (_, result), (manifestation_id, _, _, _) in zip(pending, saved)]
+            )
+        except Exception as e:
+            print(f"Batch indexing failed for {len(saved)} saved manifestation(s), run app.cli.reindex: {e}")
+            warning = f"Saved, but not indexed for search: {e}"
+
+        lines = []
+        for (index, (text, _, cache_hit)), (manifestation_id, created_at, tokens, cost) in zip(pending, saved):
+            response = ManifestationResponse(
+                id=manifestation_id,
+                manifestation_text=text,
+                created_at=created_at.isoformat(),
+                tokens_used=tokens,
+                cost=cost,
+                cached=cache_hit
+            )
+            line = {"index": index, "status": "ok", **response.model_dump()}
+            if warning:
+                line["warning"] = warning
+            lines.append(json.dumps(line) + "\n")
+        return lines
+
+    async def ndjson_stream():
+        tasks = [asyncio.ensure_future(generate_item(i, p)) for i, p in enumerate(profiles)]
+        pending = []
+        try:
+            async with SessionLocal() as db:
+                for next_done in asyncio.as_completed(tasks):
+                    index, result, error = await next_done
+                    if error is not None:
+                        yield json.dumps({"index": index, "status": "error", "detail": error}) + "\n"
+                        continue
+
+                    pending.append((index, result))
+                    if len(pending) >= settings.BATCH_FLUSH_SIZE:
+                        for line in await flush(db, pending):
+                            yield line
+                        pending = []
+
+                if pending:
+                    for line in await flush(db, pending):
+                        yield line
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    return StreamingResponse(ndjson_stream(), media_type="application/x-ndjson")
+
+@router.get("/jobs/{job_id}", response_model=JobResponse)
+async def get_job_status(
+    job_id: str,
+    wait: float = Query(0, ge=0, description="Long-poll: seconds to wait for the job to finish"),
+    current_user: User = Depends(auth.get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    if wait > 0:
+        job = await job_service.wait_for_job(db, job_id, current_user.id, wait)
+    else:
+        job = await job_service.get_job(db, job_id, current_user.id)
+
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job_service.to_response(job)
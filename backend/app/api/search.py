@@ -1,21 +1,25 @@
-from typing import List
+from typing import List, Optional
 from fastapi import APIRouter, Depends, HTTPException
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import case, func
 from sqlalchemy.future import select
-from starlette.concurrency import run_in_threadpool
 
 from app.db.session import get_db
 from app.api import auth
 from app.models.user import User
 from app.models.manifestation import Manifestation
-from app.services.vector_store import VectorStore
+from app.services.vector_store import AsyncVectorStore, get_vector_store
 
 router = APIRouter()
-vector_store = VectorStore()
+
+PREVIEW_LENGTH = 150
 
 class SearchQuery(BaseModel):
     query: str
+    limit: int = Field(10, ge=1, le=100)
+    offset: int = Field(0, ge=0, le=1000) # deep pages make Qdrant score and skip every earlier hit
+    score_threshold: Optional[float] = None
 
 class SearchResult(BaseModel):
     id: int
@@ -27,40 +31,47 @@ class SearchResult(BaseModel):
 async def search_manifestations(
     search_in: SearchQuery,
     current_user: User = Depends(auth.get_current_user),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_db),
+    vector_store: AsyncVectorStore = Depends(get_vector_store)
 ):
-    # Semantic search in Vector DB
-    # Filter by user_id in Qdrant? 
-    # My vector store impl doesn't support metadata filtering yet, 
-    # so I'll search and then verify ownership or filter results.
-    # Proper RAG usually involves filtering in the vector DB query.
-    # For now, I'll fetch results and filter.
-    
-    results = await run_in_threadpool(
-        vector_store.search_manifestations, 
-        search_in.query, 
-        limit=10 
+    # Semantic search in Vector DB, restricted to the caller's points inside Qdrant
+    results = await vector_store.search_manifestations(
+        search_in.query,
+        limit=search_in.limit,
+        offset=search_in.offset,
+        score_threshold=search_in.score_threshold,
+        filters={"user_id": current_user.id}
     )
 
-    response_items = []
-    
+    # Payloads only carry IDs: hydrate every hit from Postgres in one query,
+    # keeping Qdrant's ranking. Hits whose row is gone are dropped.
+    scores = {}
     for hit in results:
-        # Check ownership from specific metadata if I stored user_id
-        payload = hit.payload
-        if payload.get("user_id") == current_user.id:
-            # It's a match.
-            # Convert text preview
-            text = payload.get("text", "")
-            preview = text[:150] + "..." if len(text) > 150 else text
-            
-            # Get DB ID if needed, from payload "manifestation_id"
-            m_id = payload.get("manifestation_id")
-            
-            response_items.append(SearchResult(
-                id=int(m_id) if m_id else 0,
-                text=text,
-                preview=preview,
-                score=hit.score
-            ))
-    
-    return response_items
+        m_id = hit.payload.get("manifestation_id")
+        if m_id is not None and int(m_id) not in scores:
+            scores[int(m_id)] = hit.score
+
+    if not scores:
+        return []
+
+    text = Manifestation.manifestation_text
+    preview = case(
+        (func.length(text) > PREVIEW_LENGTH, func.substr(text, 1, PREVIEW_LENGTH) + "..."),
+        else_=text
+    )
+    rows = await db.execute(
+        select(Manifestation.id, text, preview.label("preview"))
+        .where(Manifestation.id.in_(list(scores)), Manifestation.user_id == current_user.id)
+    )
+    by_id = {row.id: row for row in rows}
+
+    return [
+        SearchResult(
+            id=m_id,
+            text=by_id[m_id].manifestation_text,
+            preview=by_id[m_id].preview,
+            score=score
+        )
+        for m_id, score in scores.items()
+        if m_id in by_id
+    ]
@@ -9,6 +9,7 @@ from app.models.user import User
 from app.models.usage import Usage
 from app.models.manifestation import Manifestation
 from app.schemas.usage import UsageSummary
+from app.utils.cost_tracker import CostTracker
 
 router = APIRouter()
 
@@ -33,9 +34,22 @@ async def get_usage_summary(
     )
     total_calls, total_time, total_cost = result_usage.one()
 
+    # Generation cache effectiveness
+    result_cache = await db.execute(
+        select(
+            func.count(Usage.id).filter(Usage.cache_hit.is_(True)),
+            func.count(Usage.id).filter(Usage.cache_hit.isnot(True)),
+            func.sum(Usage.tokens_used).filter(Usage.cache_hit.is_(True))
+        ).where(Usage.user_id == current_user.id)
+    )
+    cache_hits, cache_misses, cached_tokens = result_cache.one()
+
     return UsageSummary(
         total_manifestations=total_manifestations,
         total_api_calls=total_calls or 0,
         total_generation_time=total_time or 0.0,
-        total_cost=total_cost or 0.0
+        total_cost=total_cost or 0.0,
+        cache_hits=cache_hits or 0,
+        cache_misses=cache_misses or 0,
+        estimated_savings=CostTracker.calculate_cost(cached_tokens or 0)
     )
@@ -1,4 +1,5 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import FileResponse, StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 
@@ -7,22 +8,20 @@ from app.api import auth
 from app.models.user import User
 from app.models.manifestation import Manifestation
 from app.schemas.voice import VoiceRequest, VoiceResponse
-from app.services.tts_service import TTSService
+from app.services.tts_engines import TTSTimeoutError
+from app.services.tts_service import tts_service
+from app.utils.single_flight import SingleFlight
 
 router = APIRouter()
-tts_service = TTSService()
+# Concurrent requests for the same audio (text/voice/rate/pitch) share one synthesis
+voice_flight = SingleFlight()
 
-@router.post("/generate", response_model=VoiceResponse)
-async def generate_voice(
-    request: VoiceRequest,
-    current_user: User = Depends(auth.get_current_user),
-    db: AsyncSession = Depends(get_db)
-):
+async def _get_manifestation(db: AsyncSession, manifestation_id: int, user: User) -> Manifestation:
     # Fetch manifestation
     result = await db.execute(
         select(Manifestation).where(
-            Manifestation.id == request.manifestation_id,
-            Manifestation.user_id == current_user.id
+            Manifestation.id == manifestation_id,
+            Manifestation.user_id == user.id
         )
     )
     manifestation = result.scalars().first()
@@ -32,14 +31,35 @@ async def generate_voice(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Manifestation not found"
         )
-    
+    return manifestation
+
+@router.post("/generate", response_model=VoiceResponse)
+async def generate_voice(
+    request: VoiceRequest,
+    current_user: User = Depends(auth.get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    manifestation = await _get_manifestation(db, request.manifestation_id, current_user)
+
+    # Already voiced with these settings: no synthesis at all
+    cached_url = tts_service.cached_audio_url(manifestation.manifestation_text, request.accent)
+    if cached_url:
+        return VoiceResponse(
+            audio_url=cached_url,
+            message="Voice generation successful",
+            cached=True
+        )
+
     # Generate Audio
     try:
-        audio_path = await tts_service.generate_audio(
+        audio_path = await voice_flight.do(
+            tts_service.audio_key(manifestation.manifestation_text, request.accent),
+            tts_service.generate_audio,
             text=manifestation.manifestation_text,
-            user_name=current_user.full_name or "user",
             accent=request.accent
         )
+    except TTSTimeoutError as e:
+        raise HTTPException(status_code=504, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"TTS generation failed: {str(e)}")
 
@@ -47,3 +67,47 @@ async def generate_voice(
         audio_url=audio_path,
         message="Voice generation successful"
     )
+
+@router.get("/stream/{manifestation_id}")
+async def stream_voice(
+    manifestation_id: int,
+    accent: str = Query("indian_english"),
+    current_user: User = Depends(auth.get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Chunked audio/mpeg straight from the TTS engine: playback starts with the
+    first chunk instead of after the whole passage is synthesized. Audio
+    that is already cached is served from disk.
+    """
+    manifestation = await _get_manifestation(db, manifestation_id, current_user)
+    text = manifestation.manifestation_text
+
+    if tts_service.cached_audio_url(text, accent):
+        return FileResponse(tts_service.audio_path(text, accent), media_type="audio/mpeg", headers={"X-Audio-Cache": "hit"})
+
+    chunks = tts_service.stream_audio(text, accent)
+    try:
+        # Pull the first chunk up front so TTS failures still become a 500
+        first = await chunks.__anext__()
+    except StopAsyncIteration:
+        first = b""
+    except TTSTimeoutError as e:
+        raise HTTPException(status_code=504, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"TTS generation failed: {str(e)}")
+
+    async def audio_stream():
+        try:
+            yield first
+            async for chunk in chunks:
+                yield chunk
+        finally:
+            # On client disconnect, drop the partial cache file right away
+            await chunks.aclose()
+
+    return StreamingResponse(
+        audio_stream(),
+        media_type="audio/mpeg",
+        headers={"X-Audio-Cache": "miss", "Cache-Control": "no-store"}
+    )
@@ -0,0 +1,89 @@
+"""
+Rebuilds the manifestations collection with the current QDRANT_* index
+settings (quantization, HNSW, on-disk storage).
+
+    python -m app.cli.migrate_collection [--batch-size 256] [--keep-old]
+
+Points are copied as-is (vectors included, nothing is re-embedded) into a
+new `manifestations_<timestamp>` collection, which the `manifestations`
+alias is then switched to. Stop the API first when using embedded storage
+(QDRANT_PATH), since only one process can open it.
+"""
+import argparse
+import time
+
+from qdrant_client import QdrantClient
+from qdrant_client.http import models
+
+from app.core.config import settings
+from app.services.vector_store import (
+    COLLECTION_NAME,
+    create_versioned_collection,
+    point_alias,
+    qdrant_client_options,
+    resolve_collection,
+)
+
+
+def copy_points(client: QdrantClient, source: str, target: str, batch_size: int) -> int:
+    copied = 0
+    offset = None
+    while True:
+        points, offset = client.scroll(
+            collection_name=source,
+            limit=batch_size,
+            offset=offset,
+            with_payload=True,
+            with_vectors=True
+        )
+        if points:
+            client.upsert(
+                collection_name=target,
+                points=[models.PointStruct(id=p.id, vector=p.vector, payload=p.payload) for p in points],
+                wait=True
+            )
+            copied += len(points)
+            print(f"  copied {copied} points")
+        if offset is None:
+            return copied
+
+
+def migrate(client: QdrantClient, batch_size: int = 256, keep_old: bool = False) -> str:
+    current = resolve_collection(client)
+    target = create_versioned_collection(client)
+    print(
+        f"Created '{target}' (quantization={settings.QDRANT_QUANTIZATION}, "
+        f"m={settings.QDRANT_HNSW_M}, ef_construct={settings.QDRANT_HNSW_EF_CONSTRUCT}, "
+        f"on_disk_vectors={settings.QDRANT_ON_DISK_VECTORS}, on_disk_payload={settings.QDRANT_ON_DISK_PAYLOAD})"
+    )
+
+    if current is not None:
+        start = time.perf_counter()
+        copied = copy_points(client, current, target, batch_size)
+        expected = client.count(current, exact=True).count
+        if copied != expected:
+            client.delete_collection(target)
+            raise RuntimeError(f"Copied {copied} of {expected} points from '{current}'; aborted, alias unchanged.")
+        print(f"Copied {copied} points from '{current}' in {time.perf_counter() - start:.1f}s")
+
+    point_alias(client, target)
+    print(f"Alias '{COLLECTION_NAME}' -> '{target}'")
+
+    # A plain collection was already dropped by point_alias
+    if current not in (None, COLLECTION_NAME) and not keep_old:
+        client.delete_collection(current)
+        print(f"Deleted '{current}'")
+    return target
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch-size", type=int, default=256)
+    parser.add_argument("--keep-old", action="store_true", help="keep the previous collection for rollback")
+    args = parser.parse_args()
+
+    migrate(QdrantClient(**qdrant_client_options()), args.batch_size, args.keep_old)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,250 @@
+"""
+Rebuilds the vector collection from the Manifestation table, e.g. after
+losing Qdrant storage or switching embedding models.
+
+    python -m app.cli.reindex [--batch-size 256] [--parallel 4] [--model NAME]
+
+Rows are streamed in id order through a server-side cursor, split into
+chunks, embedded in large batches and upserted into a new `manifestations_<timestamp>`
+collection while the current one keeps serving searches. Once the build
+and a catch-up pass over rows written in the meantime are done, the
+`manifestations` alias is switched to it (blue/green).
+
+Progress is checkpointed after every stored batch: rerun the same command
+to resume an interrupted rebuild, or pass --fresh to start over. With
+embedded storage (QDRANT_PATH) the API must be stopped first and upserts
+run one at a time.
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Optional
+
+from fastembed import TextEmbedding
+from qdrant_client import QdrantClient
+from sqlalchemy.future import select
+
+from app.core.config import settings
+from app.db.session import SessionLocal, engine
+from app.models.manifestation import Manifestation
+from app.services.vector_store import (
+    COLLECTION_NAME,
+    build_points,
+    chunk_items,
+    create_versioned_collection,
+    embedding_executor,
+    point_alias,
+    qdrant_client_options,
+    qdrant_mode,
+    resolve_collection,
+)
+
+
+def load_checkpoint(path: str) -> Optional[dict]:
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_checkpoint(path: str, state: dict) -> None:
+    # Write-then-rename so a crash never leaves a half-written checkpoint
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(state, f)
+    os.replace(tmp_path, path)
+
+
+class Reindexer:
+    """
+    Streams Manifestation rows into `state["collection"]`. Up to `parallel`
+    upserts run at once; the checkpoint only advances past batches that are
+    stored and every batch before them, so a resume never skips rows.
+    """
+
+    def __init__(self, client: QdrantClient, model: TextEmbedding, state: dict, checkpoint_path: str, batch_size: int, parallel: int):
+        self.client = client
+        self.model = model
+        self.state = state
+        self.checkpoint_path = checkpoint_path
+        self.batch_size = batch_size
+        self.parallel = parallel
+        self.pool = ThreadPoolExecutor(max_workers=parallel, thread_name_prefix="upsert") if parallel > 1 else None
+
+        self._pending = deque() # (last_id, rows, upsert future), oldest first
+        self._cursor_id = state["last_id"] # highest id handed to an upsert
+
+        self.rows = 0
+        self.embed_seconds = 0.0
+        self.upsert_seconds = 0.0
+        self.started = time.perf_counter()
+
+    def _embed(self, texts: list) -> list:
+        return [vector.tolist() for vector in self.model.embed(texts, batch_size=self.batch_size)]
+
+    def _upsert(self, points: list) -> float:
+        start = time.perf_counter()
+        self.client.upsert(collection_name=self.state["collection"], points=points, wait=True)
+        return time.perf_counter() - start
+
+    def _complete(self, last_id: int, count: int, upsert_seconds: float) -> None:
+        self.upsert_seconds += upsert_seconds
+        self.rows += count
+        self.state["last_id"] = last_id
+        self.state["indexed"] += count
+        save_checkpoint(self.checkpoint_path, self.state)
+
+        elapsed = time.perf_counter() - self.started
+        print(
+            f"  {self.state['indexed']} rows (id <= {last_id}), {self.rows / elapsed:.0f} rows/s "
+            f"[embed {self.embed_seconds:.1f}s, upsert {self.upsert_seconds:.1f}s]"
+        )
+
+    async def _drain_one(self) -> None:
+        last_id, count, future = self._pending.popleft()
+        self._complete(last_id, count, await future)
+
+    async def flush(self) -> None:
+        while self._pending:
+            await self._drain_one()
+
+    async def _submit(self, rows: list, keys: list, vectors: list) -> None:
+        points = build_points(keys, vectors)
+        self._cursor_id = rows[-1].id
+
+        if self.pool is None:
+            self._complete(rows[-1].id, len(rows), self._upsert(points))
+            return
+
+        future = asyncio.get_running_loop().run_in_executor(self.pool, self._upsert, points)
+        self._pending.append((rows[-1].id, len(rows), future))
+        while len(self._pending) >= self.parallel:
+            await self._drain_one()
+
+    async def run_pass(self) -> int:
+        """
+        Indexes every row after the last one handed out. Returns the row count.
+        """
+        loop = asyncio.get_running_loop()
+        count = 0
+        async with SessionLocal() as db:
+            result = await db.stream(
+                select(
+                    Manifestation.id,
+                    Manifestation.user_id,
+                    Manifestation.manifestation_text,
+                    Manifestation.created_at
+                )
+                .where(Manifestation.id > self._cursor_id)
+                .order_by(Manifestation.id)
+                .execution_options(yield_per=self.batch_size)
+            )
+            async for rows in result.partitions(self.batch_size):
+                texts, keys = chunk_items([
+                    (row.manifestation_text, {
+                        "user_id": row.user_id,
+                        "manifestation_id": row.id,
+                        "timestamp": (row.created_at or datetime.now()).isoformat()
+                    })
+                    for row in rows
+                ])
+
+                start = time.perf_counter()
+                # Off the loop, so in-flight upserts keep completing meanwhile
+                vectors = await loop.run_in_executor(embedding_executor, self._embed, texts)
+                self.embed_seconds += time.perf_counter() - start
+
+                await self._submit(rows, keys, vectors)
+                count += len(rows)
+
+        await self.flush()
+        return count
+
+    def close(self) -> None:
+        if self.pool is not None:
+            self.pool.shutdown()
+
+
+def _collection_exists(client: QdrantClient, name: str) -> bool:
+    return any(c.name == name for c in client.get_collections().collections)
+
+
+async def reindex(args) -> None:
+    client = QdrantClient(**qdrant_client_options())
+    parallel = args.parallel
+    if qdrant_mode() == "embedded" and parallel > 1:
+        print("Embedded storage does not support concurrent writes; upserting one batch at a time.")
+        parallel = 1
+
+    model = TextEmbedding(model_name=args.model)
+    vector_size = len(next(iter(model.embed(["dimension probe"]))))
+
+    state = None if args.fresh else load_checkpoint(args.checkpoint)
+    if state is not None and (state.get("model") != args.model or not _collection_exists(client, state["collection"])):
+        print(f"Ignoring checkpoint for '{state['collection']}' (model changed or collection missing)")
+        state = None
+
+    if state is None:
+        state = {
+            "collection": create_versioned_collection(client, vector_size=vector_size),
+            "model": args.model,
+            "last_id": 0,
+            "indexed": 0,
+        }
+        save_checkpoint(args.checkpoint, state)
+        print(f"Building '{state['collection']}' with {args.model} ({vector_size}-d)")
+    else:
+        print(f"Resuming '{state['collection']}' after id {state['last_id']} ({state['indexed']} rows done)")
+
+    reindexer = Reindexer(client, model, state, args.checkpoint, args.batch_size, parallel)
+    try:
+        await reindexer.run_pass()
+        # Rows committed while the main pass ran
+        while await reindexer.run_pass():
+            pass
+
+        if args.no_swap:
+            print(f"Built '{state['collection']}'; alias left unchanged (--no-swap)")
+            return
+
+        previous = resolve_collection(client)
+        point_alias(client, state["collection"])
+        print(f"Alias '{COLLECTION_NAME}' -> '{state['collection']}'")
+
+        # Rows the API wrote to the old collection between the last pass and the swap
+        await reindexer.run_pass()
+    finally:
+        reindexer.close()
+        await engine.dispose()
+
+    # A plain collection was already dropped by point_alias
+    if previous not in (None, COLLECTION_NAME, state["collection"]) and not args.keep_old:
+        client.delete_collection(previous)
+        print(f"Deleted '{previous}'")
+    os.remove(args.checkpoint)
+
+    elapsed = time.perf_counter() - reindexer.started
+    print(f"Indexed {state['indexed']} rows in {elapsed:.1f}s ({reindexer.rows / elapsed:.0f} rows/s this run)")
+    if args.model != settings.EMBEDDING_MODEL:
+        print(f"Set EMBEDDING_MODEL={args.model} and restart the API so queries use the same model.")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch-size", type=int, default=256, help="rows per fetch, embed call and upsert")
+    parser.add_argument("--parallel", type=int, default=4, help="concurrent upserts (server mode only)")
+    parser.add_argument("--model", default=settings.EMBEDDING_MODEL)
+    parser.add_argument("--checkpoint", default="reindex_checkpoint.json")
+    parser.add_argument("--fresh", action="store_true", help="ignore an existing checkpoint")
+    parser.add_argument("--no-swap", action="store_true", help="build the collection but leave the alias alone")
+    parser.add_argument("--keep-old", action="store_true", help="keep the previous collection for rollback")
+    asyncio.run(reindex(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
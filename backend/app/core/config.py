@@ -1,4 +1,4 @@
-from typing import List, Union
+from typing import List, Optional, Union
 from pydantic import AnyHttpUrl, EmailStr, validator
 from pydantic_settings import BaseSettings
 
@@ -9,6 +9,9 @@ class Settings(BaseSettings):
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60 * 24 * 8 
     ALGORITHM: str = "HS256"
 
+    # Server processes (uvicorn --workers / gunicorn both read WEB_CONCURRENCY)
+    WEB_CONCURRENCY: int = 1
+
     # CORS
     BACKEND_CORS_ORIGINS: List[AnyHttpUrl] = []
 
@@ -32,8 +35,107 @@ class Settings(BaseSettings):
         return f"postgresql+asyncpg://{self.POSTGRES_USER}:{self.POSTGRES_PASSWORD}@{self.POSTGRES_SERVER}:{self.POSTGRES_PORT}/{self.POSTGRES_DB}"
 
     # External
-    HF_API_TOKEN: str
-    QDRANT_PATH: str = "qdrant_storage"
+    HF_API_TOKEN: str = "" # required when LLM_BACKEND=hf
+    QDRANT_PATH: str = "qdrant_storage" # embedded mode, single process only
+    QDRANT_URL: str = "" # server mode (self-hosted or Qdrant Cloud); takes precedence over QDRANT_PATH
+    QDRANT_API_KEY: str = ""
+    QDRANT_PREFER_GRPC: bool = False
+    QDRANT_GRPC_PORT: int = 6334
+    QDRANT_TIMEOUT: int = 10 # seconds
+    VECTOR_STORE_WARMUP: bool = True # load embeddings on startup (in background) instead of on first use
+    VECTOR_STORE_RETRY_MIN: float = 1.0 # after a failed start, requests fail fast (503) until the next retry
+    VECTOR_STORE_RETRY_MAX: float = 60.0 # backoff doubles per consecutive failure up to this
+    # Index parameters, used when the collection is created (see app.cli.migrate_collection)
+    QDRANT_QUANTIZATION: str = "none" # none | scalar | binary
+    QDRANT_QUANTIZATION_ALWAYS_RAM: bool = True
+    QDRANT_RESCORE: bool = True # re-rank quantized candidates with the original vectors
+    QDRANT_OVERSAMPLING: float = 2.0
+    QDRANT_HNSW_M: int = 16
+    QDRANT_HNSW_EF_CONSTRUCT: int = 100
+    QDRANT_HNSW_EF: Optional[int] = None # search-time ef; None uses Qdrant's default
+    QDRANT_ON_DISK_VECTORS: bool = False
+    QDRANT_ON_DISK_PAYLOAD: bool = False
+    EMBEDDING_MODEL: str = "BAAI/bge-small-en-v1.5"
+    EMBEDDING_CHUNK_WORDS: int = 256 # ~330 tokens, inside bge-small's 512; 0 embeds whole texts
+    EMBEDDING_CHUNK_OVERLAP: int = 48
+    EMBEDDING_THREADS: int = 2
+    EMBEDDING_BATCH_ENABLED: bool = True
+    EMBEDDING_BATCH_MAX_SIZE: int = 32
+    EMBEDDING_BATCH_MAX_WAIT_MS: float = 5.0
+    QUERY_EMBEDDING_CACHE_SIZE: int = 2048
+    SEARCH_RESULT_CACHE_SIZE: int = 1024
+    SEARCH_RESULT_CACHE_TTL_SECONDS: float = 60.0 # bounds staleness across worker processes
+
+    # Text-to-speech: passages are synthesized as sentence-aligned segments in parallel
+    TTS_SEGMENT_CONCURRENCY: int = 4 # 1 = one segment at a time
+    TTS_SEGMENT_MAX_CHARS: int = 600
+
+    # TTS engine: edge (edge-tts, online) or offline (silent MP3 of spoken length, no network)
+    TTS_ENGINE: str = "edge"
+    TTS_MAX_CONCURRENCY: int = 8 # synthesis sessions open at once, across all requests
+    TTS_TIMEOUT: float = 60.0 # one segment synthesis, not counting the wait for a session
+    TTS_STREAM_IDLE_TIMEOUT: float = 20.0 # longest gap between chunks when streaming a passage
+    OFFLINE_TTS_CONNECT_MS: float = 300.0
+    OFFLINE_TTS_REALTIME_FACTOR: float = 8.0 # audio seconds per wall second; 0 = instant
+
+    # LLM backend: hf (HF router), openai (any OpenAI-compatible base URL), fake (in-process)
+    LLM_BACKEND: str = "hf"
+    LLM_MODEL: str = "Qwen/Qwen2.5-7B-Instruct"
+    LLM_BASE_URL: str = ""
+    LLM_API_KEY: str = ""
+
+    # Fake LLM backend / server (load tests)
+    FAKE_LLM_WORDS: int = 700
+    FAKE_LLM_TTFB_MEDIAN_MS: float = 800.0
+    FAKE_LLM_TTFB_SIGMA: float = 0.5
+    FAKE_LLM_TOKENS_PER_SECOND: float = 60.0
+    FAKE_LLM_ERROR_RATE: float = 0.0
+    FAKE_LLM_ERROR_STATUS: int = 503
+    FAKE_LLM_SEED: Optional[int] = None
+
+    # Generation cache (in-process LRU, optional Postgres tier)
+    GENERATION_CACHE_ENABLED: bool = True
+    GENERATION_CACHE_MAX_ENTRIES: int = 1024
+    GENERATION_CACHE_TTL_SECONDS: int = 60 * 60 * 24
+    GENERATION_CACHE_PERSISTENT: bool = False
+
+    # Bulk generation (/manifestation/batch)
+    BATCH_MAX_ITEMS: int = 500
+    BATCH_CONCURRENCY: int = 4
+    BATCH_FLUSH_SIZE: int = 25
+
+    # Background generation jobs (Postgres-backed, no broker)
+    JOB_WORKERS: int = 2 # in-process workers; 0 leaves jobs to `python -m app.workers.generation_worker`
+    JOB_POLL_INTERVAL: float = 1.0
+    JOB_LONG_POLL_MAX: float = 30.0
+    JOB_STALE_AFTER: float = 600.0
+    JOB_MAX_ATTEMPTS: int = 3 # stale jobs past this many claims are failed, not requeued
+
+    # LLM admission control (bounded concurrency + priority wait queue)
+    LLM_MAX_CONCURRENCY: int = 8
+    LLM_MAX_QUEUE: int = 64
+    LLM_QUEUE_TIMEOUT: float = 30.0
+
+    # LLM retries, hedging and circuit breaker
+    LLM_MAX_RETRIES: int = 3
+    LLM_RETRY_BASE_DELAY: float = 0.5
+    LLM_RETRY_MAX_DELAY: float = 8.0
+    LLM_HEDGE_ENABLED: bool = False
+    LLM_HEDGE_PERCENTILE: float = 95.0
+    LLM_HEDGE_MIN_DELAY: float = 1.0
+    LLM_HEDGE_MIN_SAMPLES: int = 20
+    LLM_BREAKER_FAILURE_THRESHOLD: int = 5
+    LLM_BREAKER_RESET_TIMEOUT: float = 30.0
+
+    # LLM HTTP client (shared keep-alive pool, created on startup)
+    LLM_HTTP2: bool = True
+    LLM_CONNECT_TIMEOUT: float = 10.0
+    LLM_READ_TIMEOUT: float = 120.0
+    LLM_WRITE_TIMEOUT: float = 10.0
+    LLM_POOL_TIMEOUT: float = 30.0
+    LLM_MAX_CONNECTIONS: int = 100
+    LLM_MAX_KEEPALIVE_CONNECTIONS: int = 20
+    LLM_KEEPALIVE_EXPIRY: float = 30.0
 
     class Config:
         case_sensitive = True
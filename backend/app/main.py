@@ -1,12 +1,22 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from fastapi.staticfiles import StaticFiles
+import asyncio
 import os
 
 from app.core.config import settings
-from app.api import auth, manifestation, voice, history, search, usage
+from app.api import auth, manifestation, voice, history, search, usage, health
 from app.db.session import engine
 from app.db.base import Base
+from app.services import llm_service
+from app.services.vector_store import (
+    VectorStoreUnavailableError,
+    check_vector_store_deployment,
+    close_vector_store,
+    init_vector_store,
+)
+from app.workers.generation_worker import job_workers
 
 app = FastAPI(
     title=settings.PROJECT_NAME,
@@ -38,12 +48,37 @@ app.include_router(voice.router, prefix=f"{settings.API_V1_STR}/voice", tags=["v
 app.include_router(history.router, prefix=f"{settings.API_V1_STR}/history", tags=["history"])
 app.include_router(search.router, prefix=f"{settings.API_V1_STR}/search", tags=["search"])
 app.include_router(usage.router, prefix=f"{settings.API_V1_STR}/usage", tags=["usage"])
+app.include_router(health.router, prefix=f"{settings.API_V1_STR}/health", tags=["health"])
+
+@app.exception_handler(VectorStoreUnavailableError)
+async def vector_store_unavailable(request: Request, exc: VectorStoreUnavailableError):
+    return JSONResponse(
+        status_code=503,
+        content={"detail": str(exc)},
+        headers={"Retry-After": str(exc.retry_after)}
+    )
 
 @app.on_event("startup")
 async def startup():
+    check_vector_store_deployment(settings.WEB_CONCURRENCY)
     async with engine.begin() as conn:
         # Create tables - In production use Alembic!
         await conn.run_sync(Base.metadata.create_all)
+    await llm_service.init_client()
+    if settings.VECTOR_STORE_WARMUP:
+        # Load the embedding model in the background; /health/ready reports when done
+        app.state.vector_store_warmup = asyncio.create_task(init_vector_store())
+    if settings.JOB_WORKERS > 0:
+        await job_workers.start(settings.JOB_WORKERS)
+
+@app.on_event("shutdown")
+async def shutdown():
+    await job_workers.stop()
+    await llm_service.close_client()
+    warmup = getattr(app.state, "vector_store_warmup", None)
+    if warmup is not None:
+        warmup.cancel()
+    await close_vector_store()
 
 @app.get("/")
 def root():
@@ -1,3 +1,5 @@
 from app.models.user import User
 from app.models.manifestation import Manifestation
 from app.models.usage import Usage
+from app.models.generation_cache import GenerationCacheEntry
+from app.models.generation_job import GenerationJob
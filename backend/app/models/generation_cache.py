@@ -0,0 +1,14 @@
+from sqlalchemy import Column, String, Text, Float, DateTime
+from sqlalchemy.sql import func
+from app.db.base import Base
+
+class GenerationCacheEntry(Base):
+    __tablename__ = "generationcache"
+
+    # Content-addressed key: sha256 of normalized profile + prompt version + model + temperature
+    id = Column(String(64), primary_key=True, index=True)
+    manifestation_text = Column(Text, nullable=False)
+    model_id = Column(String, nullable=False)
+    prompt_version = Column(String, nullable=False)
+    temperature = Column(Float, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -0,0 +1,27 @@
+from sqlalchemy import Column, Integer, String, Text, JSON, ForeignKey, DateTime, Index
+from sqlalchemy.sql import func
+from app.db.base import Base
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_SUCCEEDED = "succeeded"
+JOB_FAILED = "failed"
+
+class GenerationJob(Base):
+    # Workers claim the oldest queued job of the best priority with SKIP LOCKED
+    __table_args__ = (
+        Index("ix_generationjob_claim", "status", "priority", "created_at"),
+    )
+
+    id = Column(String(36), primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("user.id"), index=True)
+    status = Column(String, nullable=False, default=JOB_QUEUED)
+    priority = Column(Integer, nullable=False, default=0)
+    request = Column(JSON, nullable=False)
+    attempts = Column(Integer, default=0)
+    manifestation_id = Column(Integer, ForeignKey("manifestation.id"), nullable=True)
+    result = Column(JSON, nullable=True)
+    error = Column(Text, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    started_at = Column(DateTime(timezone=True), nullable=True)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
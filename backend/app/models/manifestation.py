@@ -3,6 +3,9 @@ from sqlalchemy.sql import func
 from app.db.base import Base
 
 class Manifestation(Base):
+    # Fetch id/created_at via RETURNING on flush so batched inserts need no refresh
+    __mapper_args__ = {"eager_defaults": True}
+
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("user.id"))
     manifestation_text = Column(Text, nullable=False)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, Float, ForeignKey, DateTime
+from sqlalchemy import Column, Integer, Float, String, Boolean, ForeignKey, DateTime
 from sqlalchemy.sql import func
 from app.db.base import Base
 
@@ -9,4 +9,5 @@ class Usage(Base):
     tokens_used = Column(Integer, default=0)
     cost = Column(Float, default=0.0)
     duration_ms = Column(Float, default=0.0)
+    cache_hit = Column(Boolean, default=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -7,3 +7,4 @@ class User(Base):
     email = Column(String, unique=True, index=True, nullable=False)
     hashed_password = Column(String, nullable=False)
     is_active = Column(Boolean, default=True)
+    generation_cache_enabled = Column(Boolean, default=True)
@@ -13,6 +13,10 @@ class UserCreate(BaseModel):
     password: str
     full_name: Optional[str] = None
 
+class UserUpdate(BaseModel):
+    full_name: Optional[str] = None
+    generation_cache_enabled: Optional[bool] = None
+
 class UserLogin(BaseModel):
     email: EmailStr
     password: str
@@ -22,6 +26,7 @@ class UserResponse(BaseModel):
     email: EmailStr
     full_name: Optional[str] = None
     is_active: bool
+    generation_cache_enabled: Optional[bool] = True
 
     class Config:
         from_attributes = True
@@ -0,0 +1,14 @@
+from typing import Optional
+from pydantic import BaseModel
+
+from app.schemas.manifestation import ManifestationResponse
+
+class JobResponse(BaseModel):
+    job_id: str
+    status: str # queued, running, succeeded, failed
+    created_at: Optional[str] = None
+    started_at: Optional[str] = None
+    finished_at: Optional[str] = None
+    error: Optional[str] = None
+    warning: Optional[str] = None # succeeded, with a non-fatal problem (e.g. not indexed)
+    result: Optional[ManifestationResponse] = None
@@ -36,9 +36,14 @@ class ManifestationCreate(BaseModel):
     legacy: Optional[str] = None
     manifestation_focus: Optional[str] = None
 
+class ManifestationBatchCreate(BaseModel):
+    items: List[ManifestationCreate]
+
 class ManifestationResponse(BaseModel):
     id: int
     manifestation_text: str
     created_at: str
     tokens_used: int
     cost: float
+    cached: bool = False
+    voice_available: bool = False
@@ -5,3 +5,6 @@ class UsageSummary(BaseModel):
     total_api_calls: int
     total_generation_time: float
     total_cost: float
+    cache_hits: int = 0
+    cache_misses: int = 0
+    estimated_savings: float = 0.0
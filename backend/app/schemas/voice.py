@@ -7,3 +7,4 @@ class VoiceRequest(BaseModel):
 class VoiceResponse(BaseModel):
     audio_url: str
     message: str
+    cached: bool = False
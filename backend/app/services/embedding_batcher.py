@@ -0,0 +1,121 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, List
+
+_STOP = object()
+
+
+class EmbeddingBatcher:
+    """
+    Dynamic micro-batching for embedding calls.
+    Callers submit single texts from any thread; a dedicated thread collects
+    them for up to `max_wait_ms` (or until `max_batch_size`), runs one
+    batched `embed_fn` call and resolves each caller's future. N concurrent
+    one-item requests become one ONNX inference instead of N competing ones.
+    """
+
+    def __init__(self, embed_fn: Callable[[List[str]], list], max_batch_size: int = 32, max_wait_ms: float = 5.0):
+        self.embed_fn = embed_fn
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max_wait_ms / 1000
+
+        self.batches = 0
+        self.items = 0
+        self.cancelled = 0
+        self.batch_sizes = {} # batch size -> number of batches
+
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="embedding-batcher", daemon=True)
+        self._thread.start()
+
+    def submit(self, text: str) -> Future:
+        future = Future()
+        self._queue.put((text, future))
+        return future
+
+    def embed(self, text: str) -> list:
+        """
+        Blocking single-text embed (call from a worker thread).
+        """
+        return self.submit(text).result()
+
+    def embed_many(self, texts: List[str]) -> list:
+        futures = [self.submit(text) for text in texts]
+        return [future.result() for future in futures]
+
+    def close(self) -> None:
+        self._queue.put(_STOP)
+        self._thread.join()
+
+    def _collect(self, first) -> tuple:
+        batch = []
+        self._add(batch, first)
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is _STOP:
+                return batch, True
+            self._add(batch, item)
+        return batch, False
+
+    def _add(self, batch: list, item) -> None:
+        # A caller cancelled while queued (e.g. through asyncio.wrap_future) is
+        # dropped; once running, its future can no longer be cancelled under us
+        _, future = item
+        if future.set_running_or_notify_cancel():
+            batch.append(item)
+        else:
+            self.cancelled += 1
+
+    def _resolve(self, batch: list) -> None:
+        try:
+            vectors = self.embed_fn([text for text, _ in batch])
+            if len(vectors) != len(batch):
+                raise RuntimeError(f"embed_fn returned {len(vectors)} vectors for {len(batch)} texts")
+        except Exception as e:
+            for _, future in batch:
+                future.set_exception(e)
+        else:
+            for (_, future), vector in zip(batch, vectors):
+                future.set_result(vector)
+
+    def _run(self) -> None:
+        stop = False
+        while not stop:
+            first = self._queue.get()
+            if first is _STOP:
+                break
+            batch, stop = self._collect(first)
+            if not batch:
+                continue
+
+            try:
+                self._resolve(batch)
+            except Exception as e:
+                # Never let one bad batch end the thread: every later submit() would hang
+                print(f"Embedding batcher failed to resolve a batch: {e}")
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+
+            size = len(batch)
+            self.batches += 1
+            self.items += size
+            self.batch_sizes[size] = self.batch_sizes.get(size, 0) + 1
+
+    def stats(self) -> dict:
+        return {
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000,
+            "batches": self.batches,
+            "items": self.items,
+            "cancelled": self.cancelled,
+            "avg_batch_size": self.items / self.batches if self.batches else 0.0,
+            "batch_size_histogram": dict(sorted(self.batch_sizes.items())),
+        }
@@ -0,0 +1,87 @@
+"""
+Local OpenAI-compatible fake provider for load tests.
+
+    uvicorn app.services.fake_llm_server:app --port 8001
+
+Then point the API at it with LLM_BACKEND=openai and
+LLM_BASE_URL=http://localhost:8001/v1. Latency, length and error injection
+come from the FAKE_LLM_* settings, so our own overhead (HTTP client, queueing,
+DB, vector store) can be profiled without the real upstream.
+"""
+import json
+import time
+import uuid
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+from app.core.config import settings
+from app.services.llm_backends import FakeBackend, UpstreamError
+
+app = FastAPI(title="Fake LLM Provider", docs_url="/docs", redoc_url=None)
+
+fake = FakeBackend(
+    model=settings.LLM_MODEL,
+    words=settings.FAKE_LLM_WORDS,
+    ttfb_median_ms=settings.FAKE_LLM_TTFB_MEDIAN_MS,
+    ttfb_sigma=settings.FAKE_LLM_TTFB_SIGMA,
+    tokens_per_second=settings.FAKE_LLM_TOKENS_PER_SECOND,
+    error_rate=settings.FAKE_LLM_ERROR_RATE,
+    error_status=settings.FAKE_LLM_ERROR_STATUS,
+    seed=settings.FAKE_LLM_SEED,
+)
+
+
+def _error_response(e: UpstreamError) -> JSONResponse:
+    return JSONResponse(status_code=e.status_code, content={"error": str(e)})
+
+
+@app.post("/v1/chat/completions")
+async def chat_completions(request: Request):
+    payload = await request.json()
+    completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+    created = int(time.time())
+    model = payload.get("model", fake.model)
+
+    if not payload.get("stream"):
+        try:
+            text = await fake.complete(payload, lambda: None)
+        except UpstreamError as e:
+            return _error_response(e)
+        return {
+            "id": completion_id,
+            "object": "chat.completion",
+            "created": created,
+            "model": model,
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": text},
+                "finish_reason": "stop"
+            }]
+        }
+
+    deltas = fake.stream(payload)
+    try:
+        # Pull the first delta up front so injected errors become real HTTP statuses
+        first = await deltas.__anext__()
+    except UpstreamError as e:
+        return _error_response(e)
+
+    def chunk(delta: dict, finish_reason=None) -> str:
+        body = {
+            "id": completion_id,
+            "object": "chat.completion.chunk",
+            "created": created,
+            "model": model,
+            "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}]
+        }
+        return f"data: {json.dumps(body)}\n\n"
+
+    async def event_stream():
+        yield chunk({"role": "assistant", "content": first})
+        async for delta in deltas:
+            yield chunk({"content": delta})
+        yield chunk({}, finish_reason="stop")
+        yield "data: [DONE]\n\n"
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream")
@@ -0,0 +1,137 @@
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.models.generation_cache import GenerationCacheEntry
+from app.services import llm_service
+from app.utils.prompt_builder import PROMPT_VERSION
+
+
+def _normalize(value):
+    if isinstance(value, str):
+        return " ".join(value.split())
+    return value
+
+
+class GenerationCache:
+    """
+    Content-addressed cache of generated passages.
+    Tier 1 is an in-process LRU with TTL, tier 2 (optional) is the
+    `generationcache` Postgres table shared by all workers.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: int, persistent: bool = False, session_factory=SessionLocal):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.persistent = persistent
+        self.session_factory = session_factory
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.write_errors = 0
+
+    @staticmethod
+    def make_key(profile: dict) -> str:
+        normalized = {k: _normalize(v) for k, v in profile.items()}
+        material = json.dumps(
+            {
+                "profile": normalized,
+                "prompt_version": PROMPT_VERSION,
+                "model": llm_service.MODEL_ID,
+                "temperature": llm_service.TEMPERATURE,
+            },
+            sort_keys=True,
+            ensure_ascii=False,
+        )
+        return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+    def _get_local(self, key: str) -> Optional[str]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        stored_at, text = entry
+        if time.monotonic() - stored_at > self.ttl_seconds:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return text
+
+    def _set_local(self, key: str, text: str) -> None:
+        self._entries[key] = (time.monotonic(), text)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def get(self, key: str, db: Optional[AsyncSession] = None) -> Optional[str]:
+        text = self._get_local(key)
+
+        if text is None and self.persistent and db is not None:
+            cutoff = datetime.now(timezone.utc) - timedelta(seconds=self.ttl_seconds)
+            result = await db.execute(
+                select(GenerationCacheEntry.manifestation_text).where(
+                    GenerationCacheEntry.id == key,
+                    GenerationCacheEntry.created_at >= cutoff
+                )
+            )
+            text = result.scalar()
+            if text is not None:
+                self._set_local(key, text)
+
+        if text is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return text
+
+    async def set(self, key: str, text: str) -> None:
+        """
+        Stores `text` under `key`. The persistent row is upserted in its own
+        short transaction, so a duplicate key or a database error never
+        touches the caller's session or fails the request.
+        """
+        self._set_local(key, text)
+        if not self.persistent:
+            return
+
+        values = {
+            "manifestation_text": text,
+            "model_id": llm_service.MODEL_ID,
+            "prompt_version": PROMPT_VERSION,
+            "temperature": llm_service.TEMPERATURE,
+            "created_at": datetime.now(timezone.utc),
+        }
+        statement = insert(GenerationCacheEntry).values(id=key, **values)
+        statement = statement.on_conflict_do_update(index_elements=[GenerationCacheEntry.id], set_=values)
+        try:
+            async with self.session_factory() as db:
+                await db.execute(statement)
+                await db.commit()
+        except Exception as e:
+            self.write_errors += 1
+            print(f"Generation cache: could not persist {key[:12]}: {e}")
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "write_errors": self.write_errors,
+        }
+
+
+generation_cache = GenerationCache(
+    max_entries=settings.GENERATION_CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.GENERATION_CACHE_TTL_SECONDS,
+    persistent=settings.GENERATION_CACHE_PERSISTENT,
+)
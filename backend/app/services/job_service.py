@@ -0,0 +1,269 @@
+import asyncio
+import time
+import uuid
+import weakref
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from sqlalchemy import update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from sqlalchemy.sql import func
+
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.models.generation_job import (
+    GenerationJob,
+    JOB_QUEUED,
+    JOB_RUNNING,
+    JOB_SUCCEEDED,
+    JOB_FAILED,
+)
+from app.models.user import User
+from app.schemas.job import JobResponse
+from app.schemas.manifestation import ManifestationCreate, ManifestationResponse
+from app.services.manifestation_service import (
+    build_profile,
+    generate_text,
+    save_manifestation,
+    index_manifestation,
+)
+from app.utils.admission import QueueFullError
+from app.utils.circuit_breaker import CircuitOpenError
+
+TERMINAL_STATUSES = (JOB_SUCCEEDED, JOB_FAILED)
+
+# Wakes in-process long-pollers as soon as a local worker finishes their job;
+# pollers in other processes fall back to re-reading the row.
+_finished = weakref.WeakValueDictionary()
+
+
+def _finished_event(job_id: str) -> asyncio.Event:
+    event = _finished.get(job_id)
+    if event is None:
+        event = asyncio.Event()
+        _finished[job_id] = event
+    return event
+
+
+def _signal_finished(job_id: str) -> None:
+    event = _finished.get(job_id)
+    if event is not None:
+        event.set()
+
+
+def to_response(job: GenerationJob) -> JobResponse:
+    # A succeeded job keeps its non-fatal warning in the error column
+    succeeded = job.status == JOB_SUCCEEDED
+    return JobResponse(
+        job_id=job.id,
+        status=job.status,
+        created_at=job.created_at.isoformat() if job.created_at else None,
+        started_at=job.started_at.isoformat() if job.started_at else None,
+        finished_at=job.finished_at.isoformat() if job.finished_at else None,
+        error=None if succeeded else job.error,
+        warning=job.error if succeeded else None,
+        result=ManifestationResponse(**job.result) if job.result else None
+    )
+
+
+async def enqueue_job(db: AsyncSession, user_id: int, request: ManifestationCreate, priority: int) -> GenerationJob:
+    job = GenerationJob(
+        id=str(uuid.uuid4()),
+        user_id=user_id,
+        status=JOB_QUEUED,
+        priority=priority,
+        request=request.model_dump()
+    )
+    db.add(job)
+    await db.commit()
+    await db.refresh(job)
+    return job
+
+
+async def get_job(db: AsyncSession, job_id: str, user_id: int) -> Optional[GenerationJob]:
+    result = await db.execute(
+        select(GenerationJob)
+        .where(GenerationJob.id == job_id, GenerationJob.user_id == user_id)
+        .execution_options(populate_existing=True)
+    )
+    return result.scalars().first()
+
+
+async def wait_for_job(db: AsyncSession, job_id: str, user_id: int, wait: float) -> Optional[GenerationJob]:
+    """
+    Long-poll: returns as soon as the job is terminal or `wait` seconds pass.
+    """
+    deadline = time.monotonic() + min(wait, settings.JOB_LONG_POLL_MAX)
+    event = _finished_event(job_id)
+
+    while True:
+        job = await get_job(db, job_id, user_id)
+        remaining = deadline - time.monotonic()
+        if job is None or job.status in TERMINAL_STATUSES or remaining <= 0:
+            return job
+
+        # End the read transaction so the next poll sees the worker's commit
+        await db.commit()
+        try:
+            await asyncio.wait_for(event.wait(), timeout=min(remaining, settings.JOB_POLL_INTERVAL))
+        except asyncio.TimeoutError:
+            pass
+
+
+async def claim_next_job(db: AsyncSession) -> Optional[tuple]:
+    """
+    Atomically moves the next queued job to running and returns
+    (job_id, attempt). FOR UPDATE SKIP LOCKED lets any number of workers, in
+    any process, poll the same table without handing out a job twice; the
+    attempt number identifies this claim when the job is finished.
+    """
+    result = await db.execute(
+        select(GenerationJob.id)
+        .where(GenerationJob.status == JOB_QUEUED)
+        .order_by(GenerationJob.priority, GenerationJob.created_at)
+        .limit(1)
+        .with_for_update(skip_locked=True)
+    )
+    job_id = result.scalar()
+    if job_id is None:
+        await db.rollback()
+        return None
+
+    result = await db.execute(
+        update(GenerationJob)
+        .where(GenerationJob.id == job_id)
+        .values(status=JOB_RUNNING, started_at=func.now(), attempts=func.coalesce(GenerationJob.attempts, 0) + 1)
+        .returning(GenerationJob.attempts)
+    )
+    attempt = result.scalar()
+    await db.commit()
+    return job_id, attempt
+
+
+async def requeue_stale_jobs(db: AsyncSession) -> int:
+    """
+    Returns jobs whose worker died mid-run (running for longer than
+    JOB_STALE_AFTER) to the queue. Jobs that already used JOB_MAX_ATTEMPTS
+    are failed instead, so a job that kills its worker cannot loop forever.
+    """
+    cutoff = datetime.now(timezone.utc) - timedelta(seconds=settings.JOB_STALE_AFTER)
+    stale = (GenerationJob.status == JOB_RUNNING, GenerationJob.started_at < cutoff)
+
+    exhausted = await db.execute(
+        update(GenerationJob)
+        .where(*stale, GenerationJob.attempts >= settings.JOB_MAX_ATTEMPTS)
+        .values(
+            status=JOB_FAILED,
+            finished_at=func.now(),
+            error=f"Gave up after {settings.JOB_MAX_ATTEMPTS} attempts"
+        )
+        .returning(GenerationJob.id)
+    )
+    failed_ids = exhausted.scalars().all()
+    result = await db.execute(
+        update(GenerationJob)
+        .where(*stale)
+        .values(status=JOB_QUEUED, started_at=None)
+    )
+    await db.commit()
+
+    for job_id in failed_ids:
+        _signal_finished(job_id)
+    return result.rowcount
+
+
+def _claimed(job_id: str, attempt: int) -> tuple:
+    # Still ours: not requeued as stale and claimed again by another worker
+    return (
+        GenerationJob.id == job_id,
+        GenerationJob.status == JOB_RUNNING,
+        GenerationJob.attempts == attempt,
+    )
+
+
+async def _finish_job(db: AsyncSession, job_id: str, attempt: int, **values) -> bool:
+    result = await db.execute(
+        update(GenerationJob)
+        .where(*_claimed(job_id, attempt))
+        .values(finished_at=func.now(), **values)
+    )
+    await db.commit()
+    if result.rowcount == 0:
+        print(f"Job {job_id} attempt {attempt} no longer owns the job; result dropped")
+        return False
+    _signal_finished(job_id)
+    return True
+
+
+async def process_job(job_id: str, attempt: int, vector_store) -> Optional[int]:
+    """
+    Runs one claimed job end to end: generate, persist, index.
+    Returns a back-off in seconds when the LLM is saturated or down (the job
+    is put back in the queue), otherwise None.
+    """
+    async with SessionLocal() as db:
+        job = await db.get(GenerationJob, job_id)
+        priority = job.priority
+
+        start_time = time.time()
+        try:
+            # Inside the try: a bad stored request or deleted user fails the job instead of stranding it
+            user = await db.get(User, job.user_id)
+            if user is None:
+                raise ValueError(f"User {job.user_id} no longer exists")
+            user_id = user.id
+            profile = build_profile(ManifestationCreate(**job.request))
+
+            manifestation_text, cache_hit = await generate_text(db, user, profile, priority=priority)
+            duration_ms = (time.time() - start_time) * 1000
+
+            db_manifestation, tokens, cost = await save_manifestation(
+                db,
+                user_id,
+                manifestation_text,
+                endpoint="/manifestation/jobs",
+                duration_ms=duration_ms,
+                cache_hit=cache_hit
+            )
+            response = ManifestationResponse(
+                id=db_manifestation.id,
+                manifestation_text=manifestation_text,
+                created_at=db_manifestation.created_at.isoformat(),
+                tokens_used=tokens,
+                cost=cost,
+                cached=cache_hit
+            )
+        except (QueueFullError, CircuitOpenError) as e:
+            await db.rollback()
+            # Back-pressure is not the job's fault: give the attempt back
+            await db.execute(
+                update(GenerationJob)
+                .where(*_claimed(job_id, attempt))
+                .values(status=JOB_QUEUED, started_at=None, attempts=attempt - 1)
+            )
+            await db.commit()
+            return e.retry_after
+        except Exception as e:
+            await db.rollback()
+            await _finish_job(db, job_id, attempt, status=JOB_FAILED, error=str(e))
+            return None
+
+        # The manifestation is committed by now: an indexing failure must not
+        # fail the job, or a client retrying it would create a duplicate
+        warning = None
+        try:
+            await index_manifestation(vector_store, user_id, response.id, manifestation_text)
+        except Exception as e:
+            warning = f"Saved, but not indexed for search: {e}"
+
+        await _finish_job(
+            db,
+            job_id,
+            attempt,
+            status=JOB_SUCCEEDED,
+            manifestation_id=response.id,
+            result=response.model_dump(),
+            error=warning
+        )
+        return None
@@ -0,0 +1,254 @@
+import asyncio
+import json
+import math
+import random
+from typing import AsyncIterator, Callable, Optional
+
+import httpx
+
+HF_ROUTER_BASE_URL = "https://router.huggingface.co/v1"
+
+# Statuses worth another attempt; anything else in 4xx is the caller's fault
+RETRYABLE_STATUSES = {408, 409, 425, 429, 500, 502, 503, 504}
+
+
+class UpstreamError(Exception):
+    """
+    Non-2xx response (or error payload) from the LLM provider.
+    """
+
+    def __init__(self, status_code: int, message: str, retry_after: Optional[float] = None):
+        super().__init__(f"LLM API Error ({status_code}): {message}")
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+    @property
+    def retryable(self) -> bool:
+        return self.status_code in RETRYABLE_STATUSES
+
+
+class LLMBackend:
+    """
+    One chat-completions attempt against some provider.
+    Retries, hedging, circuit breaking and admission control stay in
+    llm_service and work the same for every backend.
+    """
+
+    name = "base"
+
+    def __init__(self, model: str):
+        self.model = model
+
+    async def complete(self, payload: dict, on_first_byte: Callable[[], None]) -> str:
+        """
+        Returns the normalized completion text. Calls `on_first_byte` once the
+        provider starts answering. Raises UpstreamError on provider errors.
+        """
+        raise NotImplementedError
+
+    def stream(self, payload: dict) -> AsyncIterator[str]:
+        """
+        Yields content deltas (`stream=true`). Raises UpstreamError before
+        the first delta when the provider rejects the request.
+        """
+        raise NotImplementedError
+
+
+def _parse_completion(result: dict) -> str:
+    if "choices" in result and len(result["choices"]) > 0:
+        content = result["choices"][0]["message"]["content"]
+        return " ".join(content.split())
+    elif "error" in result:
+        raise Exception(f"LLM API Error: {result['error']}")
+    else:
+        return "Error: Unexpected response format from AI provider."
+
+
+def _parse_retry_after(response: httpx.Response) -> Optional[float]:
+    value = response.headers.get("Retry-After")
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+def _upstream_error(response: httpx.Response, body: bytes) -> UpstreamError:
+    text = body.decode(errors="replace")
+    print(f"Error calling LLM API: {response.status_code}")
+    print(f"Response: {text}")
+    return UpstreamError(response.status_code, text[:500], _parse_retry_after(response))
+
+
+class OpenAICompatibleBackend(LLMBackend):
+    """
+    Any OpenAI-compatible `/chat/completions` endpoint (HF router, vLLM,
+    TGI, the bundled fake server, ...). Uses the shared keep-alive client.
+    """
+
+    name = "openai"
+
+    def __init__(self, base_url: str, api_key: str, model: str, get_client: Callable[[], httpx.AsyncClient]):
+        super().__init__(model)
+        self.url = base_url.rstrip("/") + "/chat/completions"
+        self.api_key = api_key
+        self._get_client = get_client
+
+    def _headers(self) -> dict:
+        return {"Authorization": f"Bearer {self.api_key}"} if self.api_key else {}
+
+    async def complete(self, payload: dict, on_first_byte: Callable[[], None]) -> str:
+        client = self._get_client()
+        response = await client.send(
+            client.build_request("POST", self.url, headers=self._headers(), json=payload),
+            stream=True
+        )
+        try:
+            on_first_byte()
+            body = await response.aread()
+        finally:
+            await response.aclose()
+
+        if response.is_error:
+            raise _upstream_error(response, body)
+        return _parse_completion(json.loads(body))
+
+    async def stream(self, payload: dict) -> AsyncIterator[str]:
+        async with self._get_client().stream("POST", self.url, headers=self._headers(), json=payload) as response:
+            if response.is_error:
+                raise _upstream_error(response, await response.aread())
+
+            async for line in response.aiter_lines():
+                if not line.startswith("data:"):
+                    continue
+                data = line[len("data:"):].strip()
+                if data == "[DONE]":
+                    break
+
+                chunk = json.loads(data)
+                if "error" in chunk:
+                    raise Exception(f"LLM API Error: {chunk['error']}")
+                choices = chunk.get("choices") or []
+                if choices:
+                    delta = (choices[0].get("delta") or {}).get("content")
+                    if delta:
+                        yield delta
+
+
+class HFRouterBackend(OpenAICompatibleBackend):
+    name = "hf"
+
+    def __init__(self, api_token: str, model: str, get_client: Callable[[], httpx.AsyncClient]):
+        super().__init__(HF_ROUTER_BASE_URL, api_token, model, get_client)
+
+    def _headers(self) -> dict:
+        if not self.api_key:
+            raise ValueError("HF_API_TOKEN environment variable is not set.")
+        return super()._headers()
+
+
+_FAKE_SENTENCES = [
+    "You stand at the threshold of a season that already recognizes your name.",
+    "Every breath you take settles you deeper into calm, certain confidence.",
+    "Your past achievements glow like lanterns along the path you now walk.",
+    "The discipline you practice today becomes the freedom you live tomorrow.",
+    "You meet each challenge as the forging fire that tempers your character.",
+    "Like flowing water, you find a way forward with patience and grace.",
+    "Your goals are unfolding now, woven into the rhythm of your ordinary days.",
+    "You speak with clarity, and the people around you feel your steady light.",
+    "Momentum gathers behind you, quiet and unstoppable, carrying you onward.",
+    "You honor your strengths and let them illuminate every room you enter.",
+    "Growth feels natural to you, the way a tree leans toward morning sun.",
+    "You are grounded, purposeful, and deeply aligned with the life you are building.",
+]
+
+
+class FakeBackend(LLMBackend):
+    """
+    In-process stand-in for load tests: no network, no tokens spent.
+    Produces passages of realistic length, with log-normal time-to-first-byte,
+    a fixed token rate for the body, and optional error injection.
+    """
+
+    name = "fake"
+
+    def __init__(
+        self,
+        model: str = "fake-llm",
+        words: int = 700,
+        ttfb_median_ms: float = 800.0,
+        ttfb_sigma: float = 0.5,
+        tokens_per_second: float = 60.0,
+        error_rate: float = 0.0,
+        error_status: int = 503,
+        seed: Optional[int] = None,
+    ):
+        super().__init__(model)
+        self.words = words
+        self.ttfb_median_ms = ttfb_median_ms
+        self.ttfb_sigma = ttfb_sigma
+        self.tokens_per_second = tokens_per_second
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self._random = random.Random(seed)
+
+    def _ttfb(self) -> float:
+        return self.ttfb_median_ms / 1000 * math.exp(self._random.gauss(0, self.ttfb_sigma))
+
+    def _word_delay(self) -> float:
+        # ~1.3 tokens per word, matching CostTracker.estimate_tokens
+        if self.tokens_per_second <= 0:
+            return 0.0
+        return 1.3 / self.tokens_per_second
+
+    def _maybe_fail(self) -> None:
+        if self._random.random() < self.error_rate:
+            raise UpstreamError(self.error_status, "Injected failure from fake backend")
+
+    def generate_words(self) -> list:
+        target = max(1, int(self.words * self._random.uniform(0.93, 1.07)))
+        words = []
+        while len(words) < target:
+            words.extend(self._random.choice(_FAKE_SENTENCES).split())
+        return words[:target]
+
+    async def complete(self, payload: dict, on_first_byte: Callable[[], None]) -> str:
+        words = self.generate_words()
+        # Non-streaming providers answer once the whole body is generated
+        await asyncio.sleep(self._ttfb() + len(words) * self._word_delay())
+        self._maybe_fail()
+        on_first_byte()
+        return " ".join(words)
+
+    async def stream(self, payload: dict) -> AsyncIterator[str]:
+        await asyncio.sleep(self._ttfb())
+        self._maybe_fail()
+
+        delay = self._word_delay()
+        for index, word in enumerate(self.generate_words()):
+            if delay:
+                await asyncio.sleep(delay)
+            yield word if index == 0 else " " + word
+
+
+def create_backend(settings, get_client: Callable[[], httpx.AsyncClient]) -> LLMBackend:
+    """
+    Builds the backend selected by LLM_BACKEND (hf | openai | fake).
+    """
+    backend = settings.LLM_BACKEND.lower()
+    if backend == "hf":
+        return HFRouterBackend(settings.HF_API_TOKEN, settings.LLM_MODEL, get_client)
+    if backend == "openai":
+        if not settings.LLM_BASE_URL:
+            raise ValueError("LLM_BASE_URL must be set when LLM_BACKEND=openai.")
+        return OpenAICompatibleBackend(settings.LLM_BASE_URL, settings.LLM_API_KEY, settings.LLM_MODEL, get_client)
+    if backend == "fake":
+        return FakeBackend(
+            words=settings.FAKE_LLM_WORDS,
+            ttfb_median_ms=settings.FAKE_LLM_TTFB_MEDIAN_MS,
+            ttfb_sigma=settings.FAKE_LLM_TTFB_SIGMA,
+            tokens_per_second=settings.FAKE_LLM_TOKENS_PER_SECOND,
+            error_rate=settings.FAKE_LLM_ERROR_RATE,
+            error_status=settings.FAKE_LLM_ERROR_STATUS,
+            seed=settings.FAKE_LLM_SEED,
+        )
+    raise ValueError(f"Unknown LLM_BACKEND '{settings.LLM_BACKEND}' (expected hf, openai or fake).")
@@ -1,46 +1,266 @@
-import requests
+import asyncio
+import importlib.util
+import math
+import random
+import time
+from collections import deque
+from typing import AsyncIterator, Optional
+
+import httpx
+
 from app.core.config import settings
-from app.utils.prompt_builder import build_manifestation_prompt
+from app.services.llm_backends import LLMBackend, UpstreamError, create_backend
+from app.utils.admission import AdmissionController, PRIORITY_INTERACTIVE
+from app.utils.circuit_breaker import CircuitBreaker
+from app.utils.prompt_builder import build_manifestation_messages
+
+MAX_TOKENS = 2000
+TEMPERATURE = 0.7
+
+# Shared async client, created and closed by the app startup/shutdown hooks
+_client: Optional[httpx.AsyncClient] = None
+
+# Caps simultaneous upstream calls; excess requests queue by priority or fail fast
+admission = AdmissionController(
+    max_concurrency=settings.LLM_MAX_CONCURRENCY,
+    max_queue=settings.LLM_MAX_QUEUE,
+    queue_timeout=settings.LLM_QUEUE_TIMEOUT,
+)
+
+# Fails fast while the provider is down instead of queueing doomed calls
+breaker = CircuitBreaker(
+    failure_threshold=settings.LLM_BREAKER_FAILURE_THRESHOLD,
+    reset_timeout=settings.LLM_BREAKER_RESET_TIMEOUT,
+)
+
+# Recent time-to-first-byte samples (seconds), used to derive the hedge deadline
+_ttfb_samples = deque(maxlen=200)
+hedge_stats = {"fired": 0, "won": 0, "skipped": 0}
 
-HF_API_URL = "https://router.huggingface.co/v1/chat/completions"
-MODEL_ID = "Qwen/Qwen2.5-7B-Instruct"
 
-def generate_manifestation(user_profile: dict, rag_context: str = "") -> str:
+def _http2_available() -> bool:
+    # HTTP/2 needs the optional `h2` package (httpx[http2])
+    return settings.LLM_HTTP2 and importlib.util.find_spec("h2") is not None
+
+
+async def init_client() -> httpx.AsyncClient:
     """
-    Generates a personalized manifestation passage using Hugging Face Router API.
+    Creates the shared keep-alive connection pool used for all LLM calls.
     """
-    if not settings.HF_API_TOKEN:
-        raise ValueError("HF_API_TOKEN environment variable is not set.")
+    global _client
+    if _client is None:
+        _client = httpx.AsyncClient(
+            http2=_http2_available(),
+            timeout=httpx.Timeout(
+                connect=settings.LLM_CONNECT_TIMEOUT,
+                read=settings.LLM_READ_TIMEOUT,
+                write=settings.LLM_WRITE_TIMEOUT,
+                pool=settings.LLM_POOL_TIMEOUT,
+            ),
+            limits=httpx.Limits(
+                max_connections=settings.LLM_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.LLM_MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=settings.LLM_KEEPALIVE_EXPIRY,
+            ),
+        )
+    return _client
+
+
+async def close_client() -> None:
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+def get_client() -> httpx.AsyncClient:
+    if _client is None:
+        raise RuntimeError("LLM client is not initialized. Call init_client() on startup.")
+    return _client
+
 
-    headers = {"Authorization": f"Bearer {settings.HF_API_TOKEN}"}
-    prompt = build_manifestation_prompt(user_profile, rag_context)
-    
+# Provider selected by LLM_BACKEND (hf | openai | fake)
+backend: LLMBackend = create_backend(settings, get_client)
+MODEL_ID = backend.model
+
+
+def _build_payload(user_profile: dict, rag_context: str = "", stream: bool = False) -> dict:
     payload = {
-        "model": MODEL_ID,
-        "messages": [
-            {"role": "user", "content": prompt}
-        ],
-        "max_tokens": 2000, 
-        "temperature": 0.7
+        "model": backend.model,
+        "messages": build_manifestation_messages(user_profile, rag_context),
+        "max_tokens": MAX_TOKENS,
+        "temperature": TEMPERATURE
     }
+    if stream:
+        payload["stream"] = True
+    return payload
+
+
+def _is_retryable(error: Exception) -> bool:
+    if isinstance(error, UpstreamError):
+        return error.retryable
+    return isinstance(error, httpx.TransportError)
+
+
+def _backoff_delay(attempt: int, retry_after: Optional[float] = None) -> float:
+    """
+    Full-jitter exponential backoff, never shorter than a server Retry-After.
+    """
+    ceiling = min(settings.LLM_RETRY_MAX_DELAY, settings.LLM_RETRY_BASE_DELAY * (2 ** attempt))
+    delay = random.uniform(0, ceiling)
+    if retry_after is not None:
+        delay = max(delay, min(retry_after, settings.LLM_RETRY_MAX_DELAY))
+    return delay
+
 
+def hedge_delay() -> Optional[float]:
+    """
+    Seconds to wait for a first byte before firing a hedge request, derived
+    from the LLM_HEDGE_PERCENTILE of recent TTFB samples. None disables hedging.
+    """
+    if not settings.LLM_HEDGE_ENABLED or len(_ttfb_samples) < settings.LLM_HEDGE_MIN_SAMPLES:
+        return None
+    ordered = sorted(_ttfb_samples)
+    index = max(0, math.ceil(settings.LLM_HEDGE_PERCENTILE / 100 * len(ordered)) - 1)
+    return max(settings.LLM_HEDGE_MIN_DELAY, ordered[index])
+
+
+async def _post_once(payload: dict, first_byte: asyncio.Event) -> str:
+    """
+    One upstream attempt. Sets `first_byte` (and records a TTFB sample) as
+    soon as the provider starts answering.
+    """
+    start = time.monotonic()
+
+    def on_first_byte():
+        _ttfb_samples.append(time.monotonic() - start)
+        first_byte.set()
+
+    return await backend.complete(payload, on_first_byte)
+
+
+async def _post_hedged(payload: dict) -> str:
+    """
+    Runs one attempt; if it has not produced its first byte within the
+    hedge deadline, races a second identical request and keeps the winner.
+    The hedge needs an admission slot of its own, so LLM_MAX_CONCURRENCY
+    still bounds upstream requests; with none free it is skipped.
+    """
+    first_byte = asyncio.Event()
+    primary = asyncio.ensure_future(_post_once(payload, first_byte))
+
+    delay = hedge_delay()
+    if delay is None:
+        return await primary
+
+    started = asyncio.ensure_future(first_byte.wait())
+    pending = {primary}
     try:
-        response = requests.post(HF_API_URL, headers=headers, json=payload)
-        response.raise_for_status()
-        
-        result = response.json()
-        if "choices" in result and len(result["choices"]) > 0:
-             content = result["choices"][0]["message"]["content"]
-             return " ".join(content.split())
-        elif "error" in result:
-             raise Exception(f"Hugging Face API Error: {result['error']}")
+        await asyncio.wait({primary, started}, timeout=delay, return_when=asyncio.FIRST_COMPLETED)
+        if primary.done() or first_byte.is_set():
+            return await primary
+
+        if not admission.try_acquire():
+            hedge_stats["skipped"] += 1
+            return await primary
+
+        hedge_start = time.monotonic()
+        hedge = asyncio.ensure_future(_post_once(payload, asyncio.Event()))
+        # Released however the hedge ends, even if cancelled before it starts
+        hedge.add_done_callback(lambda _: admission.release(time.monotonic() - hedge_start))
+        hedge_stats["fired"] += 1
+        pending = {primary, hedge}
+
+        error = None
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    if task is hedge:
+                        hedge_stats["won"] += 1
+                    return task.result()
+                error = task.exception()
+        raise error
+    finally:
+        started.cancel()
+        for task in pending:
+            task.cancel()
+
+
+def _record_outcome(error: BaseException) -> None:
+    """
+    Reports a failed attempt to the breaker. Every exit path must end up here
+    or in record_success, or a half-open trial would never be released.
+    """
+    if isinstance(error, (UpstreamError, httpx.TransportError)):
+        if _is_retryable(error):
+            breaker.record_failure()
         else:
-             return "Error: Unexpected response format from AI provider."
-             
-    except requests.exceptions.RequestException as e:
-        print(f"Error calling Hugging Face API: {e}")
+            breaker.record_success()  # provider answered; the request was bad
+    else:
+        # Cancelled, abandoned or failed before reaching the provider: no verdict
+        breaker.release_trial()
+
+
+async def generate_manifestation(
+    user_profile: dict,
+    rag_context: str = "",
+    priority: int = PRIORITY_INTERACTIVE
+) -> str:
+    """
+    Generates a personalized manifestation passage with the configured backend.
+    Retries retryable failures with jittered backoff, optionally hedges slow
+    attempts, and goes through the circuit breaker and admission control.
+    Raises QueueFullError / CircuitOpenError when the call is not admitted.
+    """
+    payload = _build_payload(user_profile, rag_context)
+
+    for attempt in range(settings.LLM_MAX_RETRIES + 1):
+        try:
+            async with admission.slot(priority):
+                breaker.before_call()
+                try:
+                    text = await _post_hedged(payload)
+                except BaseException as e:
+                    _record_outcome(e)
+                    raise
+                breaker.record_success()
+                return text
+        except (UpstreamError, httpx.TransportError) as e:
+            if not _is_retryable(e) or attempt >= settings.LLM_MAX_RETRIES:
+                raise
+            await asyncio.sleep(_backoff_delay(attempt, getattr(e, "retry_after", None)))
+
+
+async def stream_manifestation(
+    user_profile: dict,
+    rag_context: str = "",
+    priority: int = PRIORITY_INTERACTIVE
+) -> AsyncIterator[str]:
+    """
+    Streams the manifestation passage token by token (`stream=true` chat completion).
+    Yields raw content deltas as they arrive from the provider.
+    The admission slot is held for the whole stream. Failures are retried
+    only before the first delta has been yielded.
+    """
+    payload = _build_payload(user_profile, rag_context, stream=True)
+
+    for attempt in range(settings.LLM_MAX_RETRIES + 1):
+        yielded = False
         try:
-             print(f"Response: {response.text}")
-        except:
-             pass
-        raise e
+            async with admission.slot(priority):
+                breaker.before_call()
+                try:
+                    async for delta in backend.stream(payload):
+                        yielded = True
+                        yield delta
+                except BaseException as e:
+                    # Includes GeneratorExit when the consumer stops early
+                    _record_outcome(e)
+                    raise
+                breaker.record_success()
+                return
+        except (UpstreamError, httpx.TransportError) as e:
+            if not _is_retryable(e) or yielded or attempt >= settings.LLM_MAX_RETRIES:
+                raise
+            await asyncio.sleep(_backoff_delay(attempt, getattr(e, "retry_after", None)))
@@ -0,0 +1,188 @@
+from typing import Optional
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models.manifestation import Manifestation
+from app.models.usage import Usage
+from app.models.user import User
+from app.schemas.manifestation import ManifestationCreate
+from app.services import llm_service
+from app.services.generation_cache import generation_cache
+from app.utils.admission import PRIORITY_INTERACTIVE
+from app.utils.cost_tracker import CostTracker
+from app.utils.single_flight import SingleFlight
+
+# Duplicate concurrent work (client retries, double submits) collapses onto one task
+generation_flight = SingleFlight()
+index_flight = SingleFlight()
+
+
+def build_profile(request: ManifestationCreate) -> dict:
+    """
+    Maps request fields to the profile keys the prompt builder expects.
+    """
+    return {
+        "preferred_name": request.preferred_name,
+        "birth_date": request.birth_date or "Unknown",
+        "birth_time": request.birth_time or "Unknown",
+        "birth_place": request.birth_place or "Unknown",
+        "nakshatra": request.nakshatra,
+        "lagna": request.lagna,
+        "star_sign": request.star_sign,
+        "strengths": request.strengths,
+        "areas_of_improvement": request.challenges, # Mapping challenges
+        "greatest_achievement": request.greatest_achievement or "Unknown",
+        "recent_achievement": request.recent_achievement or "Unknown",
+        "next_year_goals": request.next_year_goals or "Unknown",
+        "life_goals": request.life_goals,
+        "legacy": request.legacy or "Unknown",
+        "manifestation_focus": request.desired_mindset # Mapping mindset
+    }
+
+
+def uses_generation_cache(user: User) -> bool:
+    # Users may opt out (generation_cache_enabled=False) to always get a fresh passage
+    return settings.GENERATION_CACHE_ENABLED and user.generation_cache_enabled is not False
+
+
+async def get_cached_text(db: Optional[AsyncSession], user: User, profile: dict) -> Optional[str]:
+    if not uses_generation_cache(user):
+        return None
+    return await generation_cache.get(generation_cache.make_key(profile), db)
+
+
+async def cache_text(user: User, profile: dict, manifestation_text: str) -> None:
+    if uses_generation_cache(user):
+        await generation_cache.set(generation_cache.make_key(profile), manifestation_text)
+
+
+async def _generate_and_cache(user: User, profile: dict, priority: int) -> str:
+    manifestation_text = await llm_service.generate_manifestation(profile, priority=priority)
+    await cache_text(user, profile, manifestation_text)
+    return manifestation_text
+
+
+async def generate_text(
+    db: Optional[AsyncSession],
+    user: User,
+    profile: dict,
+    priority: int = PRIORITY_INTERACTIVE
+) -> tuple:
+    """
+    Returns (manifestation_text, cache_hit), calling the LLM only on a cache miss.
+    Pass db=None when the session is shared by concurrent tasks; only the
+    in-process cache tier is consulted then.
+    """
+    cached = await get_cached_text(db, user, profile)
+    if cached is not None:
+        return cached, True
+
+    # Opted-out users only coalesce with their own in-flight requests
+    key = generation_cache.make_key(profile)
+    if not uses_generation_cache(user):
+        key = f"{key}:{user.id}"
+
+    # Only the flight leader writes the cache entry; the rest share its result
+    manifestation_text = await generation_flight.do(
+        key,
+        _generate_and_cache,
+        user,
+        profile,
+        priority
+    )
+    return manifestation_text, False
+
+
+def _build_rows(user_id: int, manifestation_text: str, endpoint: str, duration_ms: float, cache_hit: bool) -> tuple:
+    tokens = CostTracker.estimate_tokens(manifestation_text)
+    cost = 0.0 if cache_hit else CostTracker.calculate_cost(tokens)
+
+    db_manifestation = Manifestation(
+        user_id=user_id,
+        manifestation_text=manifestation_text
+    )
+    db_usage = Usage(
+        user_id=user_id,
+        endpoint=endpoint,
+        tokens_used=tokens,
+        cost=cost,
+        duration_ms=duration_ms,
+        cache_hit=cache_hit
+    )
+    return db_manifestation, db_usage, tokens, cost
+
+
+async def save_manifestation(
+    db: AsyncSession,
+    user_id: int,
+    manifestation_text: str,
+    endpoint: str,
+    duration_ms: float,
+    cache_hit: bool = False
+) -> tuple:
+    """
+    Persists the Manifestation and its Usage row in one commit.
+    Returns (manifestation, tokens, cost). Cache hits cost nothing; their
+    tokens are still recorded so the savings show up in usage.
+    """
+    db_manifestation, db_usage, tokens, cost = _build_rows(
+        user_id, manifestation_text, endpoint, duration_ms, cache_hit
+    )
+    db.add(db_manifestation)
+    db.add(db_usage)
+
+    await db.commit()
+    await db.refresh(db_manifestation)
+    return db_manifestation, tokens, cost
+
+
+async def save_manifestations(db: AsyncSession, user_id: int, items: list, endpoint: str) -> list:
+    """
+    Batched variant of save_manifestation: one transaction for all rows.
+    `items` is a list of (manifestation_text, duration_ms, cache_hit).
+    Returns (manifestation_id, created_at, tokens, cost) per item, read before
+    the commit expires the instances.
+    """
+    built = [
+        _build_rows(user_id, text, endpoint, duration_ms, cache_hit)
+        for text, duration_ms, cache_hit in items
+    ]
+    for db_manifestation, db_usage, _, _ in built:
+        db.add(db_manifestation)
+        db.add(db_usage)
+
+    await db.flush()
+    saved = [
+        (db_manifestation.id, db_manifestation.created_at, tokens, cost)
+        for db_manifestation, _, tokens, cost in built
+    ]
+    await db.commit()
+    return saved
+
+
+async def index_manifestation(vector_store, user_id: int, manifestation_id: int, manifestation_text: str) -> str:
+    """
+    Stores the passage in the vector DB once per manifestation ID.
+    """
+    metadata = {
+        "user_id": user_id,
+        "manifestation_id": manifestation_id
+    }
+    return await index_flight.do(
+        manifestation_id,
+        vector_store.store_manifestation,
+        manifestation_text,
+        metadata
+    )
+
+
+async def index_manifestations(vector_store, user_id: int, records: list) -> list:
+    """
+    Batched variant of index_manifestation: one embed call and one upsert.
+    `records` is a list of (manifestation_id, manifestation_text).
+    """
+    items = [
+        (text, {"user_id": user_id, "manifestation_id": manifestation_id})
+        for manifestation_id, text in records
+    ]
+    return await vector_store.store_manifestations(items)
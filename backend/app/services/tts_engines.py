@@ -0,0 +1,247 @@
+import asyncio
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
+import edge_tts
+
+# MPEG-2 Layer III, 48 kbps, 24 kHz, mono, no padding: 144 bytes, 576 samples
+SILENT_FRAME = bytes([0xFF, 0xF3, 0x64, 0xC4]) + bytes(140)
+FRAME_SECONDS = 576 / 24000
+CHARS_PER_SECOND = 15.0 # typical narration speaking rate
+
+
+class TTSTimeoutError(Exception):
+    """
+    A synthesis call exceeded the engine's timeout.
+    """
+
+
+class VoiceMetrics:
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.timeouts = 0
+        self.bytes = 0
+        self._latencies = deque(maxlen=100)
+        self._first_bytes = deque(maxlen=100)
+
+    def record(self, seconds: float, first_byte_seconds: float, size: int) -> None:
+        self.bytes += size
+        self._latencies.append(seconds)
+        self._first_bytes.append(first_byte_seconds)
+
+    def stats(self) -> dict:
+        latencies = sorted(self._latencies)
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "timeouts": self.timeouts,
+            "bytes": self.bytes,
+            "avg_latency_ms": sum(latencies) / len(latencies) * 1000 if latencies else 0.0,
+            "p95_latency_ms": latencies[int(0.95 * (len(latencies) - 1))] * 1000 if latencies else 0.0,
+            "avg_first_byte_ms": (
+                sum(self._first_bytes) / len(self._first_bytes) * 1000 if self._first_bytes else 0.0
+            ),
+        }
+
+
+class TTSEngine:
+    """
+    One text-to-speech provider. Subclasses only implement `_stream`; the
+    cap on concurrent sessions, timeouts and per-voice metrics live here
+    and work the same for every engine.
+    """
+
+    name = "base"
+
+    def __init__(self, max_concurrency: int = 8, timeout: float = 60.0, stream_idle_timeout: float = 20.0):
+        self.max_concurrency = max(1, max_concurrency)
+        self.timeout = timeout
+        self.stream_idle_timeout = stream_idle_timeout
+
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        self._active = 0
+        self._waiting = 0
+        self._wait_total = 0.0
+        self._admitted = 0
+        self._voices = {}
+
+    def _stream(self, text: str, voice: str, rate: str, pitch: str) -> AsyncIterator[bytes]:
+        """
+        Yields MP3 bytes as the provider produces them.
+        """
+        raise NotImplementedError
+
+    def _metrics(self, voice: str) -> VoiceMetrics:
+        return self._voices.setdefault(voice, VoiceMetrics())
+
+    @asynccontextmanager
+    async def _slot(self):
+        start = time.perf_counter()
+        self._waiting += 1
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self._waiting -= 1
+        self._admitted += 1
+        self._wait_total += time.perf_counter() - start
+        self._active += 1
+        try:
+            yield
+        finally:
+            self._active -= 1
+            self._semaphore.release()
+
+    async def synthesize(self, text: str, voice: str, rate: str = "+0%", pitch: str = "+0Hz") -> bytes:
+        """
+        The whole MP3 for `text`. Raises TTSTimeoutError when the call takes
+        longer than `timeout` seconds once it holds a session slot.
+        """
+        metrics = self._metrics(voice)
+        metrics.calls += 1
+        first_byte = None
+
+        async def collect() -> bytes:
+            nonlocal first_byte
+            audio = bytearray()
+            async for chunk in self._stream(text, voice, rate, pitch):
+                if first_byte is None:
+                    first_byte = time.perf_counter() - start
+                audio += chunk
+            return bytes(audio)
+
+        async with self._slot():
+            start = time.perf_counter()
+            try:
+                audio = await asyncio.wait_for(collect(), self.timeout)
+            except asyncio.TimeoutError:
+                metrics.timeouts += 1
+                raise TTSTimeoutError(f"{self.name} TTS timed out after {self.timeout:g}s") from None
+            except Exception:
+                metrics.errors += 1
+                raise
+
+        elapsed = time.perf_counter() - start
+        metrics.record(elapsed, elapsed if first_byte is None else first_byte, len(audio))
+        return audio
+
+    async def stream(self, text: str, voice: str, rate: str = "+0%", pitch: str = "+0Hz") -> AsyncIterator[bytes]:
+        """
+        MP3 bytes as they are produced. A long passage may take minutes, so
+        instead of a whole-call limit the engine may go at most
+        `stream_idle_timeout` seconds without producing audio.
+        """
+        metrics = self._metrics(voice)
+        metrics.calls += 1
+
+        async with self._slot():
+            start = time.perf_counter()
+            first_byte = None
+            size = 0
+            chunks = self._stream(text, voice, rate, pitch)
+            try:
+                while True:
+                    try:
+                        chunk = await asyncio.wait_for(chunks.__anext__(), self.stream_idle_timeout)
+                    except StopAsyncIteration:
+                        break
+                    except asyncio.TimeoutError:
+                        metrics.timeouts += 1
+                        raise TTSTimeoutError(
+                            f"{self.name} TTS produced no audio for {self.stream_idle_timeout:g}s"
+                        ) from None
+                    if first_byte is None:
+                        first_byte = time.perf_counter() - start
+                    size += len(chunk)
+                    yield chunk
+            except (TTSTimeoutError, GeneratorExit, asyncio.CancelledError):
+                raise
+            except Exception:
+                metrics.errors += 1
+                raise
+            finally:
+                await chunks.aclose()
+
+        elapsed = time.perf_counter() - start
+        metrics.record(elapsed, elapsed if first_byte is None else first_byte, size)
+
+    def stats(self) -> dict:
+        return {
+            "engine": self.name,
+            "max_concurrency": self.max_concurrency,
+            "in_flight": self._active,
+            "waiting": self._waiting,
+            "avg_wait_ms": self._wait_total / self._admitted * 1000 if self._admitted else 0.0,
+            "voices": {voice: metrics.stats() for voice, metrics in sorted(self._voices.items())},
+        }
+
+
+class EdgeTTSEngine(TTSEngine):
+    """
+    Microsoft Edge neural voices through edge-tts (online).
+    """
+
+    name = "edge"
+
+    async def _stream(self, text: str, voice: str, rate: str, pitch: str) -> AsyncIterator[bytes]:
+        communicate = edge_tts.Communicate(text, voice, rate=rate, pitch=pitch)
+        async for message in communicate.stream():
+            if message["type"] == "audio":
+                yield message["data"]
+
+
+class OfflineTTSEngine(TTSEngine):
+    """
+    In-process stand-in for tests, benchmarks and load tests: no network.
+    Produces valid MP3 (silent MPEG-2 Layer III frames) as long as the text
+    would take to speak at the given rate, after `connect_ms` and at
+    `realtime_factor` times real time (0 = all at once).
+    """
+
+    name = "offline"
+
+    def __init__(self, connect_ms: float = 0.0, realtime_factor: float = 0.0, chunk_frames: int = 40, **kwargs):
+        super().__init__(**kwargs)
+        self.connect_ms = connect_ms
+        self.realtime_factor = realtime_factor
+        self.chunk_frames = max(1, chunk_frames)
+
+    def frame_count(self, text: str, rate: str = "+0%") -> int:
+        # "-5%" speaks 5% slower, so the same text lasts longer
+        speed = 1 + int(rate.rstrip("%")) / 100
+        return max(1, round(len(text) / (CHARS_PER_SECOND * speed) / FRAME_SECONDS))
+
+    async def _stream(self, text: str, voice: str, rate: str, pitch: str) -> AsyncIterator[bytes]:
+        if self.connect_ms:
+            await asyncio.sleep(self.connect_ms / 1000)
+
+        remaining = self.frame_count(text, rate)
+        while remaining:
+            count = min(self.chunk_frames, remaining)
+            if self.realtime_factor > 0:
+                await asyncio.sleep(count * FRAME_SECONDS / self.realtime_factor)
+            yield SILENT_FRAME * count
+            remaining -= count
+
+
+def create_engine(settings) -> TTSEngine:
+    """
+    Builds the engine selected by TTS_ENGINE (edge | offline).
+    """
+    limits = {
+        "max_concurrency": settings.TTS_MAX_CONCURRENCY,
+        "timeout": settings.TTS_TIMEOUT,
+        "stream_idle_timeout": settings.TTS_STREAM_IDLE_TIMEOUT,
+    }
+    engine = settings.TTS_ENGINE.lower()
+    if engine == "edge":
+        return EdgeTTSEngine(**limits)
+    if engine == "offline":
+        return OfflineTTSEngine(
+            connect_ms=settings.OFFLINE_TTS_CONNECT_MS,
+            realtime_factor=settings.OFFLINE_TTS_REALTIME_FACTOR,
+            **limits
+        )
+    raise ValueError(f"Unknown TTS_ENGINE '{settings.TTS_ENGINE}' (expected edge or offline).")
@@ -1,37 +1,238 @@
-import edge_tts
+import asyncio
+import hashlib
 import os
-from datetime import datetime
+import time
+import uuid
+from collections import deque
+from typing import AsyncIterator, Optional
+
+from app.core.config import settings
+from app.services.tts_engines import TTSEngine, create_engine
+from app.utils.mp3 import join_frames
+from app.utils.text_chunker import SentenceBuffer, segment_sentences
 
 # Define absolute path for static audio, assumed relative to project root
 AUDIO_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "../../../static/audio"))
 os.makedirs(AUDIO_DIR, exist_ok=True)
 
+ACCENT_VOICES = {
+    "tamil": "ta-IN-PallaviNeural",
+    "indian_english": "en-IN-NeerjaExpressiveNeural",
+    "tamil_english": "ta-IN-ValluvarNeural", # Male option as alternate
+}
+
 class TTSService:
-    def __init__(self):
+    def __init__(self, engine: Optional[TTSEngine] = None):
+        self.engine = engine or create_engine(settings)
         # Default voice settings
-        self.voice = "ta-IN-PallaviNeural" 
+        self.voice = ACCENT_VOICES["tamil"]
         self.rate = "-5%" 
         self.pitch = "+0Hz"
 
-    async def generate_audio(self, text: str, user_name: str = "user", accent: str = "tamil") -> str:
+        # speak(): time from the call (LLM wait included) to the first audio released
+        self.spoken = 0
+        self._first_audio = deque(maxlen=100)
+
+    def voice_for(self, accent: str) -> str:
+        return ACCENT_VOICES.get(accent, self.voice)
+
+    def audio_key(self, text: str, accent: str) -> str:
+        """
+        Content address of a synthesis: the same text, voice, rate and pitch
+        always produce the same audio, so they map to the same file.
+        """
+        parts = (text, self.voice_for(accent), self.rate, self.pitch)
+        return hashlib.sha256("\x00".join(parts).encode("utf-8")).hexdigest()
+
+    def audio_path(self, text: str, accent: str) -> str:
+        return os.path.join(AUDIO_DIR, f"{self.audio_key(text, accent)}.mp3")
+
+    def cached_audio_url(self, text: str, accent: str) -> Optional[str]:
+        """
+        URL of already synthesized audio for this text/accent, or None.
+        """
+        file_path = self.audio_path(text, accent)
+        if os.path.exists(file_path):
+            return f"/static/audio/{os.path.basename(file_path)}"
+        return None
+
+    def _tmp_path(self, file_path: str) -> str:
+        # Private per-request temp file next to the target, renamed into place when complete
+        return os.path.join(AUDIO_DIR, f".{os.path.basename(file_path)}.{uuid.uuid4().hex}.tmp")
+
+    def has_audio(self, text: str) -> bool:
+        return any(self.cached_audio_url(text, accent) for accent in ACCENT_VOICES)
+
+    async def _synthesize_segment(self, text: str, voice: str) -> bytes:
+        return await self.engine.synthesize(text, voice, rate=self.rate, pitch=self.pitch)
+
+    async def synthesize(self, text: str, accent: str = "tamil") -> bytes:
         """
-        Generates audio from text using edge-tts.
+        Whole-passage MP3. The text is cut at sentence boundaries into
+        TTS_SEGMENT_MAX_CHARS segments, up to TTS_SEGMENT_CONCURRENCY of them
+        are synthesized at once (same voice, rate and pitch), and their
+        frames are joined back in order.
         """
-        voice = self.voice
-        if accent == "indian_english":
-            voice = "en-IN-NeerjaExpressiveNeural"
-        elif accent == "tamil_english":
-            voice = "ta-IN-ValluvarNeural" # Male option as alternate
+        voice = self.voice_for(accent)
+        segments = segment_sentences(text, settings.TTS_SEGMENT_MAX_CHARS) or [text]
+        semaphore = asyncio.Semaphore(max(1, settings.TTS_SEGMENT_CONCURRENCY))
+
+        async def synthesize_one(segment: str) -> bytes:
+            async with semaphore:
+                return await self._synthesize_segment(segment, voice)
 
-        safe_name = "".join([c for c in user_name if c.isalnum() or c in (' ', '_', '-')]).strip()
-        safe_name = safe_name.replace(" ", "_")
-        
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = f"{safe_name}_{timestamp}.mp3"
-        file_path = os.path.join(AUDIO_DIR, filename)
+        tasks = [asyncio.ensure_future(synthesize_one(segment)) for segment in segments]
+        try:
+            parts = await asyncio.gather(*tasks)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            raise
 
-        communicate = edge_tts.Communicate(text, voice, rate=self.rate, pitch=self.pitch)
-        await communicate.save(file_path)
+        audio = join_frames(parts)
+        if not audio and any(parts):
+            raise ValueError("TTS engine returned audio that is not MPEG Layer III")
+        return audio
+
+    async def generate_audio(self, text: str, accent: str = "tamil") -> str:
+        """
+        Generates audio from text with the configured engine (see synthesize), unless the
+        same synthesis is already on disk.
+        """
+        cached_url = self.cached_audio_url(text, accent)
+        if cached_url:
+            return cached_url
+
+        audio = await self.synthesize(text, accent)
+        return self.store_audio(text, accent, audio)
+
+    def store_audio(self, text: str, accent: str, audio: bytes) -> str:
+        """
+        Publishes synthesized audio under its content address and returns its URL.
+        """
+        file_path = self.audio_path(text, accent)
+
+        # Write to a private temp file and rename it into place, so readers
+        # never see a partial file and concurrent writers can't collide
+        tmp_path = self._tmp_path(file_path)
+        try:
+            with open(tmp_path, "wb") as f:
+                f.write(audio)
+            os.replace(tmp_path, file_path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
 
         # Return relative path for frontend - /static/audio/...
-        return f"/static/audio/{filename}"
+        return f"/static/audio/{os.path.basename(file_path)}"
+
+    async def stream_audio(self, text: str, accent: str = "tamil") -> AsyncIterator[bytes]:
+        """
+        Yields MP3 bytes as the engine produces them, so playback can start
+        after the first chunk. The bytes are teed into the audio cache; only
+        a stream that ran to the end is published there.
+        """
+        file_path = self.audio_path(text, accent)
+        tmp_path = self._tmp_path(file_path)
+        chunks = self.engine.stream(text, self.voice_for(accent), rate=self.rate, pitch=self.pitch)
+        try:
+            with open(tmp_path, "wb") as audio:
+                async for chunk in chunks:
+                    audio.write(chunk)
+                    yield chunk
+            os.replace(tmp_path, file_path)
+        finally:
+            # Client disconnects and TTS errors leave nothing behind, and free the engine session
+            await chunks.aclose()
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    async def speak(self, deltas: AsyncIterator[str], accent: str = "tamil") -> AsyncIterator[tuple]:
+        """
+        Pipelined synthesis of a passage that is still being written. Deltas
+        are cut into sentences as they arrive and every complete sentence is
+        synthesized right away (up to TTS_SEGMENT_CONCURRENCY at once).
+        Yields, interleaved as they become available:
+            ("delta", str)                            each text delta, unchanged
+            ("audio", (index, sentence, mp3_frames))  per sentence, in order
+        and finally ("done", (text, mp3)) with the full text and joined audio.
+        """
+        voice = self.voice_for(accent)
+        semaphore = asyncio.Semaphore(max(1, settings.TTS_SEGMENT_CONCURRENCY))
+        started = time.perf_counter()
+        events = asyncio.Queue()
+        sentences = asyncio.Queue() # (sentence, synthesis task), None once the text ends
+        synthesis = []
+
+        async def synthesize_one(sentence: str) -> bytes:
+            async with semaphore:
+                return await self._synthesize_segment(sentence, voice)
+
+        def start(sentence: str) -> None:
+            task = asyncio.ensure_future(synthesize_one(sentence))
+            synthesis.append(task)
+            sentences.put_nowait((sentence, task))
+
+        async def read_text() -> str:
+            buffer = SentenceBuffer()
+            parts = []
+            try:
+                async for delta in deltas:
+                    parts.append(delta)
+                    events.put_nowait(("delta", delta))
+                    for sentence in buffer.feed(delta):
+                        start(sentence)
+                for sentence in buffer.flush():
+                    start(sentence)
+            finally:
+                sentences.put_nowait(None)
+            return "".join(parts)
+
+        async def emit_audio() -> list:
+            # Sentences finish out of order; release each only after all earlier ones
+            parts = []
+            while (item := await sentences.get()) is not None:
+                sentence, task = item
+                data = await task
+                audio = join_frames([data])
+                if not audio and data:
+                    raise ValueError("TTS engine returned audio that is not MPEG Layer III")
+                if not parts:
+                    self._first_audio.append(time.perf_counter() - started)
+                events.put_nowait(("audio", (len(parts), sentence, audio)))
+                parts.append(audio)
+            return parts
+
+        workers = [asyncio.ensure_future(read_text()), asyncio.ensure_future(emit_audio())]
+        for worker in workers:
+            worker.add_done_callback(lambda task: events.put_nowait(("finished", task)))
+
+        try:
+            running = len(workers)
+            while running:
+                kind, payload = await events.get()
+                if kind == "finished":
+                    running -= 1
+                    payload.result() # re-raises a failed LLM stream or synthesis
+                    continue
+                yield kind, payload
+
+            text, parts = (worker.result() for worker in workers)
+            self.spoken += 1
+            yield "done", (text, b"".join(parts))
+        finally:
+            # Client disconnects and failures stop the LLM stream and pending synthesis
+            for task in workers + synthesis:
+                task.cancel()
+
+    def stats(self) -> dict:
+        first_audio = sorted(self._first_audio)
+        return {
+            **self.engine.stats(),
+            "spoken": self.spoken,
+            "avg_first_audio_ms": sum(first_audio) / len(first_audio) * 1000 if first_audio else 0.0,
+            "p95_first_audio_ms": first_audio[int(0.95 * (len(first_audio) - 1))] * 1000 if first_audio else 0.0,
+        }
+
+
+tts_service = TTSService()
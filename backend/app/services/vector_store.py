@@ -1,70 +1,585 @@
+import asyncio
+import hashlib
+import math
 import os
+import time
 import uuid
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from qdrant_client import QdrantClient
+from typing import Optional
+from qdrant_client import AsyncQdrantClient, QdrantClient
 from qdrant_client.http import models
 from fastembed import TextEmbedding
 from app.core.config import settings
+from app.services.embedding_batcher import EmbeddingBatcher
+from app.utils.lru_cache import LRUCache
+from app.utils.text_chunker import chunk_words
 
-class VectorStore:
-    def __init__(self):
-        # Initialize Qdrant Client
-        path = settings.QDRANT_PATH
-        self.client = QdrantClient(path=path) 
-        
-        self.collection_name = "manifestations"
-        self.embedding_model = TextEmbedding() 
-        
-        self._ensure_collection_exists()
-
-    def _ensure_collection_exists(self):
-        """Checks if collection exists, creates it if not."""
-        collections = self.client.get_collections()
-        collection_names = [c.name for c in collections.collections]
-        
-        if self.collection_name not in collection_names:
-            self.client.create_collection(
-                collection_name=self.collection_name,
-                vectors_config=models.VectorParams(
-                    size=384, 
-                    distance=models.Distance.COSINE
-                )
+# user_id / manifestation_id are stored as integers, so they get integer
+# (exact-match) indexes rather than keyword ones
+PAYLOAD_INDEXES = {
+    "user_id": models.PayloadSchemaType.INTEGER,
+    "manifestation_id": models.PayloadSchemaType.INTEGER, # group_by key
+}
+
+
+# Everything a point carries besides its vector; text lives in Postgres only
+PAYLOAD_FIELDS = ("user_id", "manifestation_id", "chunk", "timestamp")
+
+VECTOR_SIZE = 384 # BAAI/bge-small-en-v1.5
+COLLECTION_NAME = "manifestations"
+
+
+def build_quantization_config(kind: str, always_ram: bool = True):
+    """
+    none | scalar (int8, ~4x smaller) | binary (1 bit, ~32x smaller, needs rescoring).
+    """
+    kind = kind.lower()
+    if kind == "none":
+        return None
+    if kind == "scalar":
+        return models.ScalarQuantization(scalar=models.ScalarQuantizationConfig(
+            type=models.ScalarType.INT8,
+            quantile=0.99,
+            always_ram=always_ram
+        ))
+    if kind == "binary":
+        return models.BinaryQuantization(binary=models.BinaryQuantizationConfig(always_ram=always_ram))
+    raise ValueError(f"Unknown quantization '{kind}' (expected none, scalar or binary).")
+
+
+def build_search_params(
+    hnsw_ef: Optional[int] = None,
+    quantized: bool = False,
+    rescore: bool = True,
+    oversampling: float = 2.0
+) -> Optional[models.SearchParams]:
+    quantization = None
+    if quantized:
+        quantization = models.QuantizationSearchParams(rescore=rescore, oversampling=oversampling)
+    if hnsw_ef is None and quantization is None:
+        return None
+    return models.SearchParams(hnsw_ef=hnsw_ef, quantization=quantization)
+
+
+def collection_config(vector_size: int = VECTOR_SIZE) -> dict:
+    """
+    create_collection arguments from the QDRANT_* index settings. Existing
+    collections keep the parameters they were created with; apply changes
+    with `python -m app.cli.migrate_collection`.
+    """
+    return {
+        "vectors_config": models.VectorParams(
+            size=vector_size,
+            distance=models.Distance.COSINE,
+            on_disk=settings.QDRANT_ON_DISK_VECTORS
+        ),
+        "hnsw_config": models.HnswConfigDiff(
+            m=settings.QDRANT_HNSW_M,
+            ef_construct=settings.QDRANT_HNSW_EF_CONSTRUCT
+        ),
+        "quantization_config": build_quantization_config(
+            settings.QDRANT_QUANTIZATION,
+            always_ram=settings.QDRANT_QUANTIZATION_ALWAYS_RAM
+        ),
+        "on_disk_payload": settings.QDRANT_ON_DISK_PAYLOAD,
+    }
+
+
+def search_params() -> Optional[models.SearchParams]:
+    return build_search_params(
+        hnsw_ef=settings.QDRANT_HNSW_EF,
+        quantized=settings.QDRANT_QUANTIZATION.lower() != "none",
+        rescore=settings.QDRANT_RESCORE,
+        oversampling=settings.QDRANT_OVERSAMPLING
+    )
+
+
+_POINT_NAMESPACE = uuid.UUID("8f6a3c1e-4d2b-4f5a-9c7e-2b1d0e3f4a5b")
+
+
+def point_id(manifestation_id, chunk: int = 0) -> str:
+    """
+    Deterministic point ID, so indexing a manifestation twice (retries,
+    reindex resumes, blue/green catch-up) overwrites instead of duplicating.
+    """
+    if manifestation_id is None:
+        return str(uuid.uuid4())
+    key = str(manifestation_id) if chunk == 0 else f"{manifestation_id}:{chunk}"
+    return str(uuid.uuid5(_POINT_NAMESPACE, key))
+
+
+def chunk_items(items: list) -> tuple:
+    """
+    Splits (text, metadata) items into EMBEDDING_CHUNK_WORDS windows, since
+    passages run past the model's 512-token limit and would otherwise be
+    embedded truncated. Returns the chunk texts and a matching list of
+    (metadata, chunk index).
+    """
+    texts, keys = [], []
+    for text, metadata in items:
+        for index, chunk in enumerate(chunk_words(text, settings.EMBEDDING_CHUNK_WORDS, settings.EMBEDDING_CHUNK_OVERLAP)):
+            texts.append(chunk)
+            keys.append((metadata, index))
+    return texts, keys
+
+
+def build_points(keys: list, vectors: list, timestamp: Optional[str] = None) -> list:
+    """
+    One point per chunk; chunks of a manifestation share its payload IDs
+    and are grouped back together at search time.
+    """
+    timestamp = timestamp or datetime.now().isoformat()
+    points = []
+    for (metadata, chunk), vector in zip(keys, vectors):
+        payload = {key: metadata.get(key) for key in PAYLOAD_FIELDS}
+        payload["chunk"] = chunk
+        payload["timestamp"] = metadata.get("timestamp") or timestamp
+        points.append(models.PointStruct(
+            id=point_id(metadata.get("manifestation_id"), chunk),
+            vector=vector,
+            payload=payload
+        ))
+    return points
+
+
+def top_hits(groups: models.GroupsResult, offset: int) -> list:
+    """
+    Best chunk per manifestation (max-sim), in rank order, after `offset`.
+    """
+    return [group.hits[0] for group in groups.groups][offset:]
+
+
+def build_filter(filters: Optional[dict]) -> Optional[models.Filter]:
+    """
+    Turns {"field": value} pairs into a Qdrant filter where every field must match.
+    """
+    if not filters:
+        return None
+    return models.Filter(must=[
+        models.FieldCondition(key=key, match=models.MatchValue(value=value))
+        for key, value in filters.items()
+    ])
+
+def missing_payload_indexes(info: models.CollectionInfo) -> list:
+    """
+    (field, schema) pairs from PAYLOAD_INDEXES the collection does not index yet.
+    """
+    existing = info.payload_schema or {}
+    return [(field_name, schema) for field_name, schema in PAYLOAD_INDEXES.items() if field_name not in existing]
+
+
+def ensure_payload_indexes(client: QdrantClient, collection_name: str) -> None:
+    """
+    Indexes the payload fields searches filter on, so Qdrant can apply
+    the filter during HNSW traversal instead of scanning.
+    """
+    for field_name, schema in missing_payload_indexes(client.get_collection(collection_name)):
+        client.create_payload_index(
+            collection_name=collection_name,
+            field_name=field_name,
+            field_schema=schema
+        )
+
+
+def resolve_collection(client: QdrantClient, name: str = COLLECTION_NAME) -> Optional[str]:
+    """
+    Physical collection currently serving `name`: the alias target, `name`
+    itself while it is still a plain collection, or None if neither exists.
+    """
+    for alias in client.get_aliases().aliases:
+        if alias.alias_name == name:
+            return alias.collection_name
+    if any(c.name == name for c in client.get_collections().collections):
+        return name
+    return None
+
+
+def create_versioned_collection(client: QdrantClient, name: str = COLLECTION_NAME, vector_size: int = VECTOR_SIZE) -> str:
+    """
+    Creates `<name>_<timestamp>` with the current index settings, ready to
+    be filled and then published with point_alias.
+    """
+    versioned = f"{name}_{datetime.now().strftime('%Y%m%d%H%M%S')}"
+    client.create_collection(collection_name=versioned, **collection_config(vector_size))
+    ensure_payload_indexes(client, versioned)
+    return versioned
+
+
+def point_alias(client: QdrantClient, collection_name: str, alias: str = COLLECTION_NAME) -> None:
+    """
+    Makes `alias` serve `collection_name`. Swapping an existing alias is
+    atomic. The first time, the plain collection holding the alias name has
+    to be dropped first, so searches briefly see no collection.
+    """
+    operations = []
+    if any(a.alias_name == alias for a in client.get_aliases().aliases):
+        operations.append(models.DeleteAliasOperation(delete_alias=models.DeleteAlias(alias_name=alias)))
+    elif any(c.name == alias for c in client.get_collections().collections):
+        client.delete_collection(alias)
+
+    operations.append(models.CreateAliasOperation(create_alias=models.CreateAlias(
+        collection_name=collection_name,
+        alias_name=alias
+    )))
+    client.update_collection_aliases(change_aliases_operations=operations)
+
+
+def qdrant_client_options() -> dict:
+    """
+    Client arguments for the configured mode: server when QDRANT_URL is set,
+    otherwise embedded storage under QDRANT_PATH.
+    """
+    if settings.QDRANT_URL:
+        return {
+            "url": settings.QDRANT_URL,
+            "api_key": settings.QDRANT_API_KEY or None,
+            "prefer_grpc": settings.QDRANT_PREFER_GRPC,
+            "grpc_port": settings.QDRANT_GRPC_PORT,
+            "timeout": settings.QDRANT_TIMEOUT,
+        }
+    return {"path": settings.QDRANT_PATH}
+
+
+def qdrant_mode() -> str:
+    return "server" if settings.QDRANT_URL else "embedded"
+
+
+def check_vector_store_deployment(workers: int) -> None:
+    """
+    Embedded storage is locked by the first process that opens it, so any
+    other worker would fail on its first vector call. Refuse to start instead.
+    """
+    if workers > 1 and qdrant_mode() == "embedded":
+        raise RuntimeError(
+            f"Embedded Qdrant (QDRANT_PATH) only supports a single process, "
+            f"but WEB_CONCURRENCY={workers}. Set QDRANT_URL to use a Qdrant "
+            f"server, or run with one worker."
+        )
+
+
+class VectorStoreUnavailableError(Exception):
+    """
+    The vector store failed to start and is backing off before the next
+    attempt. `retry_after` is a hint in whole seconds.
+    """
+
+    def __init__(self, retry_after: int, reason: Optional[str] = None):
+        super().__init__(f"Vector store is unavailable: {reason or 'starting'}")
+        self.retry_after = retry_after
+
+
+async def prepare_collection(client: AsyncQdrantClient, name: str = COLLECTION_NAME) -> None:
+    """
+    Creates `name` with the current index settings unless it exists (as a
+    collection or an alias), and adds any missing payload indexes.
+    """
+    collections = await client.get_collections()
+    collection_names = [c.name for c in collections.collections]
+    collection_names += [a.alias_name for a in (await client.get_aliases()).aliases]
+
+    if name not in collection_names:
+        await client.create_collection(collection_name=name, **collection_config())
+
+    info = await client.get_collection(name)
+    for field_name, schema in missing_payload_indexes(info):
+        await client.create_payload_index(collection_name=name, field_name=field_name, field_schema=schema)
+
+
+def load_embedding_model() -> TextEmbedding:
+    return TextEmbedding(model_name=settings.EMBEDDING_MODEL)
+
+
+# Bounded pool reserved for ONNX inference, so slow embedding work never
+# occupies the threads the DB driver and HTTP handlers rely on
+embedding_executor = ThreadPoolExecutor(
+    max_workers=settings.EMBEDDING_THREADS,
+    thread_name_prefix="embedding"
+)
+
+
+class AsyncVectorStore:
+    """
+    Embedding model, batching, caches and Qdrant access for manifestations,
+    on AsyncQdrantClient. Scripts and CLIs use a plain QdrantClient with the
+    module-level helpers instead.
+    Embedding never runs on the event loop or the default threadpool: batched
+    embeds resolve on the batcher thread, direct ones on embedding_executor.
+    Build it with `await AsyncVectorStore.create()`.
+    """
+
+    # An alias once app.cli.migrate_collection has run, a plain collection before
+    collection_name = COLLECTION_NAME
+
+    def __init__(self, embedding_model: TextEmbedding, client: AsyncQdrantClient):
+        self.client = client
+        self.embedding_model = embedding_model
+
+        # Concurrent single-text embeds are coalesced into one batched inference
+        self.batcher = None
+        if settings.EMBEDDING_BATCH_ENABLED:
+            self.batcher = EmbeddingBatcher(
+                self._embed_batch,
+                max_batch_size=settings.EMBEDDING_BATCH_MAX_SIZE,
+                max_wait_ms=settings.EMBEDDING_BATCH_MAX_WAIT_MS
             )
 
-    def store_manifestation(self, text: str, metadata: dict) -> str:
+        # Repeated queries (tab switches, refreshes) skip the ONNX model and Qdrant.
+        # Result entries embed the user's write generation, so a write to that
+        # user's points makes their old entries unreachable.
+        self.query_embeddings = LRUCache(settings.QUERY_EMBEDDING_CACHE_SIZE)
+        self.search_results = LRUCache(
+            settings.SEARCH_RESULT_CACHE_SIZE,
+            ttl_seconds=settings.SEARCH_RESULT_CACHE_TTL_SECONDS
+        )
+        self._user_generations = {}
+        self.invalidations = 0
+
+        self.search_params = search_params()
+
+    @classmethod
+    async def create(cls, embedding_model: Optional[TextEmbedding] = None) -> "AsyncVectorStore":
         """
-        Embeds and stores the manifestation text in Qdrant.
+        Connects and prepares the collection before the batcher thread starts,
+        so a failed attempt leaves nothing running. Pass `embedding_model` to
+        reuse one already loaded.
         """
-        embeddings = list(self.embedding_model.embed([text]))
-        vector = embeddings[0] 
+        if embedding_model is None:
+            # Model loading (and the first-run download) is blocking
+            loop = asyncio.get_running_loop()
+            embedding_model = await loop.run_in_executor(embedding_executor, load_embedding_model)
 
-        point_id = str(uuid.uuid4())
-        
-        metadata["timestamp"] = datetime.now().isoformat()
-        metadata["text"] = text 
+        client = AsyncQdrantClient(**qdrant_client_options())
+        try:
+            await prepare_collection(client, cls.collection_name)
+        except BaseException:
+            await client.close()
+            raise
+        return cls(embedding_model, client)
 
-        self.client.upsert(
-            collection_name=self.collection_name,
-            points=[
-                models.PointStruct(
-                    id=point_id,
-                    vector=vector.tolist(),
-                    payload=metadata
-                )
-            ]
+    async def close(self) -> None:
+        if self.batcher is not None:
+            # Joins the thread, which may be finishing a batch
+            await asyncio.get_running_loop().run_in_executor(None, self.batcher.close)
+            self.batcher = None
+        await self.client.close()
+
+    async def warm_up(self) -> None:
+        """
+        Runs one embedding so the ONNX session is loaded before real traffic.
+        """
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(embedding_executor, self._embed_batch, ["warm up"])
+
+    def _embed_batch(self, texts: list) -> list:
+        return [vector.tolist() for vector in self.embedding_model.embed(texts)]
+
+    async def _embed(self, texts: list) -> list:
+        if self.batcher is None:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(embedding_executor, self._embed_batch, texts)
+        return list(await asyncio.gather(*(
+            asyncio.wrap_future(self.batcher.submit(text)) for text in texts
+        )))
+
+    def _query_key(self, query_text: str) -> tuple:
+        return (settings.EMBEDDING_MODEL, hashlib.sha256(query_text.encode("utf-8")).hexdigest())
+
+    async def _embed_query(self, query_text: str):
+        key = self._query_key(query_text)
+        vector = self.query_embeddings.get(key)
+        if vector is None:
+            vector = (await self._embed([query_text]))[0]
+            self.query_embeddings.set(key, vector)
+        return vector
+
+    def _search_key(self, query_text: str, filters: Optional[dict], *params) -> Optional[tuple]:
+        user_id = (filters or {}).get("user_id")
+        if user_id is None:
+            return None
+        return (
+            user_id,
+            self._user_generations.get(user_id, 0),
+            hashlib.sha256(query_text.encode("utf-8")).hexdigest(),
+            tuple(sorted(filters.items())),
+            *params,
         )
-        return point_id
 
-    def search_manifestations(self, query_text: str, limit: int = 3):
+    def invalidate_user(self, user_id) -> None:
+        """
+        Drops cached search results for `user_id` (called on every write).
+        """
+        if user_id is None:
+            return
+        self._user_generations[user_id] = self._user_generations.get(user_id, 0) + 1
+        self.invalidations += 1
+
+    def _invalidate_items(self, items: list) -> None:
+        for user_id in {metadata.get("user_id") for _, metadata in items}:
+            self.invalidate_user(user_id)
+
+    async def store_manifestation(self, text: str, metadata: dict) -> str:
+        """
+        Embeds the manifestation text and stores the vector in Qdrant.
+        Only PAYLOAD_FIELDS are kept from `metadata`; the text stays in Postgres.
+        """
+        return (await self.store_manifestations([(text, metadata)]))[0]
+
+    async def store_manifestations(self, items: list) -> list:
         """
-        Semantic search for manifestations.
+        Batched variant of store_manifestation.
+        `items` is a list of (text, metadata); the chunks of all texts are
+        embedded in one call and written with a single upsert. Returns the
+        first chunk's Point ID for each item, in order.
         """
-        embeddings = list(self.embedding_model.embed([query_text]))
-        query_vector = embeddings[0]
+        if not items:
+            return []
 
-        results = self.client.search(
+        texts, keys = chunk_items(items)
+        points = build_points(keys, await self._embed(texts))
+
+        await self.client.upsert(collection_name=self.collection_name, points=points)
+        self._invalidate_items(items)
+        return [point.id for point, (_, chunk) in zip(points, keys) if chunk == 0]
+
+    async def search_manifestations(
+        self,
+        query_text: str,
+        limit: int = 3,
+        offset: int = 0,
+        score_threshold: Optional[float] = None,
+        filters: Optional[dict] = None
+    ):
+        """
+        Semantic search for manifestations: one hit per manifestation, scored
+        by its best-matching chunk. Hits carry PAYLOAD_FIELDS only; hydrate
+        text from Postgres by manifestation_id.
+        `filters` ({"user_id": 1, ...}) are applied inside Qdrant.
+        Per-user searches are served from the result cache when possible.
+        """
+        cache_key = self._search_key(query_text, filters, limit, offset, score_threshold)
+        if cache_key is not None:
+            cached = self.search_results.get(cache_key)
+            if cached is not None:
+                return cached
+
+        # Group chunks by manifestation; a group scores as its best chunk.
+        # search_groups has no offset, so fetch offset + limit groups and skip.
+        groups = await self.client.search_groups(
             collection_name=self.collection_name,
-            query_vector=query_vector.tolist(),
-            limit=limit
+            query_vector=await self._embed_query(query_text),
+            group_by="manifestation_id",
+            query_filter=build_filter(filters),
+            search_params=self.search_params,
+            with_payload=list(PAYLOAD_FIELDS),
+            limit=offset + limit,
+            group_size=1,
+            score_threshold=score_threshold
         )
+        results = top_hits(groups, offset)
+        if cache_key is not None:
+            self.search_results.set(cache_key, results)
         return results
+
+    def stats(self) -> dict:
+        return {
+            "query_embeddings": self.query_embeddings.stats(),
+            "search_results": self.search_results.stats(),
+            "invalidations": self.invalidations,
+            "embedding_batcher": self.batcher.stats() if self.batcher else None,
+        }
+
+
+# Process-wide instance shared by every router and worker: one embedding
+# model in memory and one Qdrant connection (or handle on QDRANT_PATH).
+_vector_store: Optional[AsyncVectorStore] = None
+_embedding_model: Optional[TextEmbedding] = None # kept across failed starts
+_ready = False
+_warmup_error: Optional[str] = None
+_failures = 0
+_retry_at = 0.0
+_lock = asyncio.Lock()
+
+
+def _retry_delay(failures: int) -> float:
+    return min(settings.VECTOR_STORE_RETRY_MAX, settings.VECTOR_STORE_RETRY_MIN * 2 ** (failures - 1))
+
+
+async def warm_up_vector_store() -> AsyncVectorStore:
+    """
+    Creates (once) and warms up the shared AsyncVectorStore.
+    Concurrent callers wait for the first one. After a failure, callers get
+    VectorStoreUnavailableError until the backoff has passed, instead of
+    each retrying against a Qdrant that is down.
+    """
+    global _vector_store, _embedding_model, _ready, _warmup_error, _failures, _retry_at
+    async with _lock:
+        if _ready:
+            return _vector_store
+
+        wait = _retry_at - time.monotonic()
+        if wait > 0:
+            raise VectorStoreUnavailableError(math.ceil(wait), _warmup_error)
+
+        try:
+            if _embedding_model is None:
+                loop = asyncio.get_running_loop()
+                _embedding_model = await loop.run_in_executor(embedding_executor, load_embedding_model)
+            if _vector_store is None:
+                _vector_store = await AsyncVectorStore.create(_embedding_model)
+            await _vector_store.warm_up()
+        except Exception as e:
+            _failures += 1
+            _retry_at = time.monotonic() + _retry_delay(_failures)
+            _warmup_error = str(e) or type(e).__name__
+            raise
+
+        _ready = True
+        _failures = 0
+        _warmup_error = None
+        return _vector_store
+
+
+async def init_vector_store() -> None:
+    """
+    Startup hook: warms up in the background so the app starts serving at once.
+    """
+    try:
+        await warm_up_vector_store()
+    except Exception as e:
+        print(f"Vector store warm-up failed: {e}")
+
+
+async def close_vector_store() -> None:
+    """
+    Shutdown hook: stops the batcher thread and closes the Qdrant client.
+    """
+    global _vector_store, _ready
+    async with _lock:
+        if _vector_store is not None:
+            await _vector_store.close()
+        _vector_store = None
+        _ready = False
+
+
+async def get_vector_store() -> AsyncVectorStore:
+    """
+    FastAPI dependency returning the shared AsyncVectorStore, creating it
+    lazily if startup warm-up has not finished (or was disabled).
+    """
+    if _ready:
+        return _vector_store
+    return await warm_up_vector_store()
+
+
+def vector_store_status() -> dict:
+    return {
+        "ready": _ready,
+        "mode": qdrant_mode(),
+        "error": _warmup_error,
+        "retry_in_s": max(0.0, _retry_at - time.monotonic()) if not _ready else 0.0,
+    }
+
+
+def vector_store_stats() -> Optional[dict]:
+    return _vector_store.stats() if _vector_store is not None else None
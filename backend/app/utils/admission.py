@@ -0,0 +1,148 @@
+import asyncio
+import heapq
+import itertools
+import math
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+
+# Lower value is served first
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BATCH = 10
+
+
+class QueueFullError(Exception):
+    """
+    Raised when a request cannot be admitted (queue past its threshold or
+    the wait timed out). `retry_after` is a hint in whole seconds.
+    """
+
+    def __init__(self, retry_after: int, message: str = "Upstream is busy, please retry later."):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    """
+    Bounded concurrency with a priority wait queue.
+    At most `max_concurrency` holders run at once; up to `max_queue` wait,
+    ordered by (priority, arrival). Anything beyond that fails fast.
+    """
+
+    def __init__(self, max_concurrency: int, max_queue: int, queue_timeout: float):
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+
+        self._active = 0
+        self._queued = 0
+        self._waiters = []
+        self._seq = itertools.count()
+
+        self.admitted = 0
+        self.rejected = 0
+        self.timed_out = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+        self._service_times = deque(maxlen=100)
+
+    @property
+    def queue_depth(self) -> int:
+        return self._queued
+
+    @property
+    def in_flight(self) -> int:
+        return self._active
+
+    def retry_after(self) -> int:
+        avg_service = (
+            sum(self._service_times) / len(self._service_times) if self._service_times else 1.0
+        )
+        estimate = avg_service * (self._queued + 1) / max(self.max_concurrency, 1)
+        return max(1, math.ceil(estimate))
+
+    def ensure_capacity(self) -> None:
+        """
+        Raises QueueFullError if a new request would be rejected right now.
+        """
+        if self._active >= self.max_concurrency and self._queued >= self.max_queue:
+            self.rejected += 1
+            raise QueueFullError(self.retry_after())
+
+    def try_acquire(self) -> bool:
+        """
+        Takes a slot only if one is free right now (and nobody is queued).
+        The caller must release() it.
+        """
+        if self._active < self.max_concurrency and self._queued == 0:
+            self._active += 1
+            self._record_admit(0.0)
+            return True
+        return False
+
+    async def acquire(self, priority: int = PRIORITY_INTERACTIVE) -> None:
+        start = time.monotonic()
+
+        if self.try_acquire():
+            return
+
+        self.ensure_capacity()
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._seq), future))
+        self._queued += 1
+        try:
+            await asyncio.wait_for(future, timeout=self.queue_timeout)
+        except asyncio.TimeoutError:
+            self._queued -= 1
+            self.timed_out += 1
+            raise QueueFullError(self.retry_after())
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # Slot was handed over just as we were cancelled; pass it on
+                self.release()
+            else:
+                self._queued -= 1
+            raise
+
+        self._record_admit(time.monotonic() - start)
+
+    def release(self, service_time: float = None) -> None:
+        if service_time is not None:
+            self._service_times.append(service_time)
+
+        # Hand the slot straight to the next live waiter; skip abandoned ones
+        while self._waiters:
+            _, _, future = heapq.heappop(self._waiters)
+            if not future.done():
+                self._queued -= 1
+                future.set_result(None)
+                return
+        self._active -= 1
+
+    @asynccontextmanager
+    async def slot(self, priority: int = PRIORITY_INTERACTIVE):
+        await self.acquire(priority)
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self.release(time.monotonic() - start)
+
+    def _record_admit(self, waited: float) -> None:
+        self.admitted += 1
+        self._wait_total += waited
+        self._wait_max = max(self._wait_max, waited)
+
+    def stats(self) -> dict:
+        return {
+            "max_concurrency": self.max_concurrency,
+            "max_queue": self.max_queue,
+            "in_flight": self._active,
+            "queue_depth": self._queued,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "timed_out": self.timed_out,
+            "avg_wait_ms": (self._wait_total / self.admitted * 1000) if self.admitted else 0.0,
+            "max_wait_ms": self._wait_max * 1000,
+        }
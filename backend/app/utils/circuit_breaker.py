@@ -0,0 +1,92 @@
+import math
+import time
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """
+    Raised instead of calling a provider that is considered down.
+    `retry_after` is a hint in whole seconds until the next trial call.
+    """
+
+    def __init__(self, retry_after: int, message: str = "Upstream provider is unavailable, please retry later."):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker.
+    After `failure_threshold` failures in a row the circuit opens and calls
+    fail fast for `reset_timeout` seconds. Then one trial call is let
+    through (half-open): success closes the circuit, failure re-opens it.
+    """
+
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+
+        self.state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self.rejected = 0
+        self.opened = 0
+
+    def _retry_after(self) -> int:
+        remaining = self.reset_timeout - (time.monotonic() - self._opened_at)
+        return max(1, math.ceil(remaining))
+
+    def ensure_closed(self) -> None:
+        """
+        Raises CircuitOpenError if a call would be rejected, without
+        consuming the half-open trial.
+        """
+        if self.state == OPEN and time.monotonic() - self._opened_at < self.reset_timeout:
+            raise CircuitOpenError(self._retry_after())
+
+    def before_call(self) -> None:
+        if self.state == OPEN:
+            if time.monotonic() - self._opened_at < self.reset_timeout:
+                self.rejected += 1
+                raise CircuitOpenError(self._retry_after())
+            self.state = HALF_OPEN
+            self._trial_in_flight = False
+
+        if self.state == HALF_OPEN:
+            if self._trial_in_flight:
+                self.rejected += 1
+                raise CircuitOpenError(1)
+            self._trial_in_flight = True
+
+    def release_trial(self) -> None:
+        """
+        Frees the half-open trial without a verdict (the call was cancelled,
+        abandoned or never reached the provider), so the next call can take it.
+        """
+        self._trial_in_flight = False
+
+    def record_success(self) -> None:
+        self.state = CLOSED
+        self._failures = 0
+        self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        self._failures += 1
+        if self.state == HALF_OPEN or self._failures >= self.failure_threshold:
+            if self.state != OPEN:
+                self.opened += 1
+            self.state = OPEN
+            self._opened_at = time.monotonic()
+            self._trial_in_flight = False
+
+    def stats(self) -> dict:
+        return {
+            "state": self.state,
+            "consecutive_failures": self._failures,
+            "opened": self.opened,
+            "rejected": self.rejected,
+        }
@@ -0,0 +1,101 @@
+"""
+Minimal MPEG audio Layer III frame handling, enough to join separately
+synthesized MP3 segments into one stream without re-encoding.
+"""
+from typing import Iterator, List, Optional, Tuple
+
+# Layer III bitrates (kbps) by bitrate index, for MPEG-1 and MPEG-2/2.5
+_BITRATES = {
+    "mpeg1": (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320),
+    "mpeg2": (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+}
+# Sample rates by version bits (3 = MPEG-1, 2 = MPEG-2, 0 = MPEG-2.5)
+_SAMPLE_RATES = {
+    3: (44100, 48000, 32000),
+    2: (22050, 24000, 16000),
+    0: (11025, 12000, 8000),
+}
+
+ID3V1_SIZE = 128
+
+
+def id3v2_size(data: bytes) -> int:
+    """
+    Length of a leading ID3v2 tag (header, body and optional footer), or 0.
+    """
+    if len(data) < 10 or data[:3] != b"ID3":
+        return 0
+    body = (data[6] << 21) | (data[7] << 14) | (data[8] << 7) | data[9] # syncsafe
+    footer = 10 if data[5] & 0x10 else 0
+    return 10 + body + footer
+
+
+def parse_frame_header(header: bytes) -> Optional[Tuple[int, float]]:
+    """
+    (frame length in bytes, duration in seconds) for a Layer III frame
+    header, or None if the 4 bytes are not one.
+    """
+    if len(header) < 4 or header[0] != 0xFF or header[1] & 0xE0 != 0xE0:
+        return None
+    version = (header[1] >> 3) & 0x3
+    layer = (header[1] >> 1) & 0x3
+    bitrate_index = header[2] >> 4
+    sample_rate_index = (header[2] >> 2) & 0x3
+    padding = (header[2] >> 1) & 0x1
+    if version == 1 or layer != 1 or bitrate_index in (0, 15) or sample_rate_index == 3:
+        return None
+
+    mpeg1 = version == 3
+    bitrate = _BITRATES["mpeg1" if mpeg1 else "mpeg2"][bitrate_index] * 1000
+    sample_rate = _SAMPLE_RATES[version][sample_rate_index]
+    samples = 1152 if mpeg1 else 576
+    length = (samples // 8) * bitrate // sample_rate + padding
+    return length, samples / sample_rate
+
+
+def iter_frames(data: bytes) -> Iterator[Tuple[int, int, float]]:
+    """
+    Yields (offset, length, duration) for every complete audio frame,
+    skipping ID3 tags and resynchronising past junk bytes.
+    """
+    end = len(data)
+    if end >= ID3V1_SIZE and data[end - ID3V1_SIZE:end - ID3V1_SIZE + 3] == b"TAG":
+        end -= ID3V1_SIZE
+
+    offset = id3v2_size(data)
+    while offset + 4 <= end:
+        parsed = parse_frame_header(data[offset:offset + 4])
+        if parsed is None or offset + parsed[0] > end:
+            offset += 1
+            continue
+        length, duration = parsed
+        yield offset, length, duration
+        offset += length
+
+
+def is_info_frame(frame: bytes) -> bool:
+    """
+    Xing/Info (VBR header) frames describe one file's length; mid-stream
+    they would make players misjudge the duration.
+    """
+    head = frame[4:40]
+    return b"Xing" in head or b"Info" in head
+
+
+def join_frames(segments: List[bytes]) -> bytes:
+    """
+    Concatenates the audio frames of each segment in order: ID3 tags,
+    Xing/Info frames and partial or stray bytes between frames are dropped,
+    so the result is one continuous frame sequence.
+    """
+    out = bytearray()
+    for data in segments:
+        for offset, length, _ in iter_frames(data):
+            frame = data[offset:offset + length]
+            if not is_info_frame(frame):
+                out += frame
+    return bytes(out)
+
+
+def duration(data: bytes) -> float:
+    return sum(frame_duration for _, _, frame_duration in iter_frames(data))
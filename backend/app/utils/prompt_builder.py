@@ -1,5 +1,8 @@
-def build_manifestation_prompt(user_profile: dict, rag_context: str = "") -> str:
-    prompt = f"""You are an expert manifestation coach with knowledge of Vedic astrology, positive psychology,
+import hashlib
+
+# Static instructions, sent as an identical system message on every request so
+# provider-side prefix/KV caching can reuse it. Profile data never goes here.
+SYSTEM_PROMPT = """You are an expert manifestation coach with knowledge of Vedic astrology, positive psychology,
 goal alignment, and motivational narrative design.
 
 Your task is to generate a deeply personalized manifestation passage
@@ -13,26 +16,10 @@ OUTPUT CONSTRAINTS:
 - Output format: Plain text only
 - Do NOT include headings, explanations, labels, or quotes
 
-INPUT PARAMETERS (use as semantic context, integrate naturally):
-- Preferred Name: {user_profile.get('preferred_name')}
-- Date of Birth: {user_profile.get('birth_date')}
-- Birth Time: {user_profile.get('birth_time')}
-- Birth Place: {user_profile.get('birth_place')}
-- Nakshatra: {user_profile.get('nakshatra')}
-- Lagna (Ascendant): {user_profile.get('lagna')}
-- Star Sign: {user_profile.get('star_sign')}
-- Strengths: {user_profile.get('strengths')}
-- Areas of Improvement: {user_profile.get('areas_of_improvement')}
-- Greatest Achievement in Life: {user_profile.get('greatest_achievement')}
-- Major Achievement in the Last One Year: {user_profile.get('recent_achievement')}
-- Goals for the Next One Year: {user_profile.get('next_year_goals')}
-- Long-Term Life Goals: {user_profile.get('life_goals')}
-- Desired Legacy: {user_profile.get('legacy')}
-- Primary Manifestation Focus: {user_profile.get('manifestation_focus')}
-
-INSPIRATIONAL CONTEXT (RAG - Wisdom from similar paths):
-{rag_context}
-(Use the essence of the above context if relevant to reinforce the user's journey, but focus primarily on THEIR specific details.)
+INPUT PARAMETERS:
+The user message lists the person's profile. Use it as semantic context and integrate it naturally.
+It may also include INSPIRATIONAL CONTEXT (wisdom from similar paths). Use the essence of that context
+if relevant to reinforce the user's journey, but focus primarily on THEIR specific details.
 
 NARRATIVE STRATEGY:
 - Acknowledge their cosmic imprint using their Nakshatra and Lagna (subtly, not as a horoscope reading, but as energizing traits)
@@ -49,7 +36,50 @@ QUALITY RULES:
 - Avoid mystical guarantees, but embrace the magic of belief and psychology
 - Maintain high emotional coherence and readability
 - Ensure the output length is between 650 and 750 words
-- Speak directly to their soul, not just their mind
+- Speak directly to their soul, not just their mind"""
+
+# (label, profile key) pairs, compiled once into the user message template
+PROFILE_FIELDS = (
+    ("Preferred Name", "preferred_name"),
+    ("Date of Birth", "birth_date"),
+    ("Birth Time", "birth_time"),
+    ("Birth Place", "birth_place"),
+    ("Nakshatra", "nakshatra"),
+    ("Lagna (Ascendant)", "lagna"),
+    ("Star Sign", "star_sign"),
+    ("Strengths", "strengths"),
+    ("Areas of Improvement", "areas_of_improvement"),
+    ("Greatest Achievement in Life", "greatest_achievement"),
+    ("Major Achievement in the Last One Year", "recent_achievement"),
+    ("Goals for the Next One Year", "next_year_goals"),
+    ("Long-Term Life Goals", "life_goals"),
+    ("Desired Legacy", "legacy"),
+    ("Primary Manifestation Focus", "manifestation_focus"),
+)
+
+USER_TEMPLATE = "\n".join(f"{label}: {{{key}}}" for label, key in PROFILE_FIELDS)
+RAG_TEMPLATE = "\n\nINSPIRATIONAL CONTEXT:\n{rag_context}"
+CLOSING = "\n\nGenerate the manifestation passage now."
+
+# Changes whenever any prompt text changes, so caches and metrics can key on it
+PROMPT_VERSION = hashlib.sha256(
+    "\x00".join((SYSTEM_PROMPT, USER_TEMPLATE, RAG_TEMPLATE, CLOSING)).encode("utf-8")
+).hexdigest()[:12]
+
+
+def build_user_message(user_profile: dict, rag_context: str = "") -> str:
+    message = USER_TEMPLATE.format_map({key: user_profile.get(key) for _, key in PROFILE_FIELDS})
+    if rag_context:
+        message += RAG_TEMPLATE.format(rag_context=rag_context)
+    return message + CLOSING
+
 
-Generate the manifestation passage now."""
-    return prompt
+def build_manifestation_messages(user_profile: dict, rag_context: str = "") -> list:
+    """
+    Chat messages for a generation: the fixed system prompt plus a compact
+    user message holding only the profile fields (and optional RAG context).
+    """
+    return [
+        {"role": "system", "content": SYSTEM_PROMPT},
+        {"role": "user", "content": build_user_message(user_profile, rag_context)},
+    ]
@@ -0,0 +1,64 @@
+import re
+
+
+def chunk_words(text: str, window: int, overlap: int) -> list:
+    """
+    Splits `text` into windows of `window` words, each repeating at least
+    the last `overlap` words of the previous one so no sentence is only ever
+    seen cut in half. The last window is aligned to the end of the text, so
+    every chunk is full length and no short tail chunk is over-weighted.
+    Short texts (or window <= 0) come back as a single chunk.
+    """
+    words = text.split()
+    if window <= 0 or len(words) <= window:
+        return [text]
+
+    step = max(1, window - overlap)
+    starts = list(range(0, len(words) - window, step)) + [len(words) - window]
+    return [" ".join(words[start:start + window]) for start in starts]
+
+
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+
+
+def split_sentences(text: str) -> list:
+    return [sentence for sentence in _SENTENCE_END.split(text.strip()) if sentence]
+
+
+def segment_sentences(text: str, max_chars: int) -> list:
+    """
+    Packs whole sentences into segments of up to `max_chars` characters
+    (a single longer sentence becomes its own segment), for synthesizing a
+    passage in independent pieces that still break at natural pauses.
+    """
+    segments, current = [], ""
+    for sentence in split_sentences(text):
+        if current and len(current) + 1 + len(sentence) > max_chars:
+            segments.append(current)
+            current = sentence
+        else:
+            current = f"{current} {sentence}" if current else sentence
+    if current:
+        segments.append(current)
+    return segments
+
+
+class SentenceBuffer:
+    """
+    Incremental split_sentences for streamed text: feed() takes deltas and
+    returns the sentences they complete. A sentence counts as complete once
+    whitespace follows its closing punctuation, so a delta ending in "3."
+    or "..." never cuts a sentence early.
+    """
+
+    def __init__(self):
+        self._buffer = ""
+
+    def feed(self, delta: str) -> list:
+        self._buffer += delta
+        *sentences, self._buffer = _SENTENCE_END.split(self._buffer)
+        return [sentence.strip() for sentence in sentences if sentence.strip()]
+
+    def flush(self) -> list:
+        rest, self._buffer = self._buffer.strip(), ""
+        return [rest] if rest else []
@@ -0,0 +1,137 @@
+import asyncio
+from typing import Optional
+
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.services import job_service
+from app.services.vector_store import get_vector_store
+
+
+class JobWorkerPool:
+    """
+    Background workers that drain the `generationjob` table.
+    Runs inside the API process (JOB_WORKERS > 0) or standalone via
+    `python -m app.workers.generation_worker`, so generation capacity can
+    scale separately from API workers. Postgres is the only coordination.
+    """
+
+    def __init__(self):
+        self._tasks = []
+        self._wakeup = asyncio.Event()
+        self.processed = 0
+
+    @property
+    def running(self) -> bool:
+        return bool(self._tasks)
+
+    async def start(self, workers: int) -> None:
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(workers)]
+        self._tasks.append(asyncio.create_task(self._requeue_stale()))
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def join(self) -> None:
+        await asyncio.gather(*self._tasks)
+
+    def notify(self) -> None:
+        """
+        Wakes idle local workers right after a job is enqueued.
+        """
+        self._wakeup.set()
+
+    async def _idle(self, timeout: float) -> None:
+        try:
+            await asyncio.wait_for(self._wakeup.wait(), timeout=timeout)
+        except asyncio.TimeoutError:
+            pass
+        self._wakeup.clear()
+
+    async def _worker(self) -> None:
+        while True:
+            # Resolved before claiming, so an unavailable store never strands a running job
+            try:
+                vector_store = await get_vector_store()
+            except Exception as e:
+                print(f"Job worker waiting for the vector store: {e}")
+                await asyncio.sleep(getattr(e, "retry_after", settings.JOB_POLL_INTERVAL))
+                continue
+
+            claimed: Optional[tuple] = None
+            try:
+                async with SessionLocal() as db:
+                    claimed = await job_service.claim_next_job(db)
+            except Exception as e:
+                print(f"Job worker could not claim a job: {e}")
+
+            if claimed is None:
+                await self._idle(settings.JOB_POLL_INTERVAL)
+                continue
+
+            job_id, attempt = claimed
+            try:
+                backoff = await job_service.process_job(job_id, attempt, vector_store)
+            except Exception as e:
+                print(f"Job worker crashed on job {job_id}: {e}")
+                backoff = None
+
+            self.processed += 1
+            if backoff:
+                await asyncio.sleep(backoff)
+
+    async def _requeue_stale(self) -> None:
+        while True:
+            await asyncio.sleep(settings.JOB_STALE_AFTER / 2)
+            try:
+                async with SessionLocal() as db:
+                    requeued = await job_service.requeue_stale_jobs(db)
+                if requeued:
+                    print(f"Requeued {requeued} stale generation job(s)")
+            except Exception as e:
+                print(f"Stale job sweep failed: {e}")
+
+    def stats(self) -> dict:
+        return {
+            "workers": max(len(self._tasks) - 1, 0),
+            "processed": self.processed,
+        }
+
+
+job_workers = JobWorkerPool()
+
+
+async def main() -> None:
+    from app.db.base import Base
+    from app.db.session import engine
+    from app.services import llm_service
+    from app.services.vector_store import close_vector_store, init_vector_store, qdrant_mode
+
+    # The API process holds embedded storage open, so this process could never use it
+    if qdrant_mode() == "embedded":
+        raise RuntimeError(
+            "The standalone generation worker needs a Qdrant server: embedded "
+            "storage (QDRANT_PATH) is locked by the API process. Set QDRANT_URL, "
+            "or keep JOB_WORKERS > 0 to run workers inside the API."
+        )
+
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    await llm_service.init_client()
+    await init_vector_store()
+
+    workers = max(settings.JOB_WORKERS, 1)
+    print(f"Starting {workers} generation worker(s)")
+    await job_workers.start(workers)
+    try:
+        await job_workers.join()
+    finally:
+        await job_workers.stop()
+        await llm_service.close_client()
+        await close_vector_store()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
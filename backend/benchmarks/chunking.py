@@ -0,0 +1,205 @@
+"""
+Single-vector vs. chunked indexing: recall by where the answer sits in the
+passage, and indexing throughput.
+
+    python benchmarks/chunking.py --docs 300
+    python benchmarks/chunking.py --hashing     # offline, no model download
+
+Each synthetic passage is ~700 words of filler with three distinctive
+"fact" sentences planted near the start, middle and end. Queries paraphrase
+one fact, and a hit counts if its passage is in the top k. A single vector
+only sees what fits in the model's 512-token window, so recall for middle and
+end facts shows what truncation costs. --hashing swaps in a bag-of-words
+hashing embedder with the same truncation, for checking the harness offline.
+"""
+import argparse
+import hashlib
+import os
+import random
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from qdrant_client import QdrantClient
+from qdrant_client.http import models
+
+from app.utils.text_chunker import chunk_words
+
+PROFESSIONS = [
+    "architect", "baker", "cardiologist", "carpenter", "chemist", "choreographer", "dentist",
+    "electrician", "filmmaker", "firefighter", "geologist", "jeweler", "journalist", "librarian",
+    "marine biologist", "midwife", "novelist", "pharmacist", "photographer", "pilot", "potter",
+    "sculptor", "software engineer", "surgeon", "tailor", "translator", "veterinarian", "winemaker",
+]
+PLACES = [
+    "Chennai", "Madurai", "Kochi", "Mysuru", "Pune", "Jaipur", "Shillong", "Varanasi", "Goa",
+    "Lisbon", "Nairobi", "Reykjavik", "Kyoto", "Hanoi", "Lima", "Oslo", "Marrakesh", "Sydney",
+    "Vancouver", "Istanbul", "Cairo", "Seoul", "Dublin", "Havana",
+]
+PASSIONS = [
+    "playing the veena", "growing orchids", "restoring vintage motorcycles", "long-distance swimming",
+    "teaching chess to children", "painting murals", "birdwatching at dawn", "brewing filter coffee",
+    "rock climbing", "writing haiku", "building telescopes", "cooking for strangers",
+    "learning Sanskrit", "training rescue dogs", "restoring old temples", "sailing solo",
+]
+FILLER = [
+    "You breathe in calm and breathe out doubt, settling into quiet confidence.",
+    "Every small step you take today strengthens the foundation of tomorrow.",
+    "Your energy is steady, your focus is clear, and your heart is open.",
+    "You welcome each challenge as a teacher that sharpens your resolve.",
+    "Gratitude fills your mornings and purpose guides your evenings.",
+    "You trust the rhythm of your growth, patient and persistent.",
+    "Light gathers around your intentions and carries them forward.",
+    "You honor your past while stepping boldly into what comes next.",
+]
+
+FACT = "You thrive as a {profession} in {place}, finding deep joy in {passion}."
+QUERY = "{profession} living in {place} who loves {passion}"
+POSITIONS = ("start", "middle", "end")
+
+
+def make_corpus(docs: int, words: int, seed: int):
+    rng = random.Random(seed)
+    passages, queries = [], []
+    for doc_id in range(docs):
+        facts = [
+            {"profession": rng.choice(PROFESSIONS), "place": rng.choice(PLACES), "passion": rng.choice(PASSIONS)}
+            for _ in POSITIONS
+        ]
+        filler = []
+        while sum(len(s.split()) for s in filler) < words:
+            filler.append(rng.choice(FILLER))
+
+        # Plant the facts at ~5%, ~50% and ~90% of the passage
+        sentences = list(filler)
+        for fact, fraction in zip(reversed(facts), (0.9, 0.5, 0.05)):
+            sentences.insert(int(len(sentences) * fraction), FACT.format(**fact))
+        passages.append(" ".join(sentences))
+
+        for position, fact in zip(POSITIONS, facts):
+            queries.append((doc_id, position, QUERY.format(**fact)))
+    return passages, queries
+
+
+class HashingEmbedding:
+    """
+    Offline stand-in: hashed bag of words, truncated like the real model
+    (~0.75 words per token, 512 tokens).
+    """
+
+    def __init__(self, dim: int = 384, max_words: int = 384):
+        self.dim = dim
+        self.max_words = max_words
+
+    def embed(self, texts, batch_size: int = 256):
+        for text in texts:
+            vector = np.zeros(self.dim, dtype=np.float32)
+            for word in text.lower().split()[:self.max_words]:
+                word = word.strip(".,")
+                vector[int(hashlib.md5(word.encode()).hexdigest(), 16) % self.dim] += 1.0
+            yield vector / (np.linalg.norm(vector) or 1.0)
+
+
+def build_index(client: QdrantClient, name: str, model, passages: list, window: int, overlap: int, batch_size: int) -> dict:
+    """
+    window <= 0 indexes one vector per passage (the old path).
+    """
+    dim = len(next(iter(model.embed(["probe"]))))
+    client.recreate_collection(
+        collection_name=name,
+        vectors_config=models.VectorParams(size=dim, distance=models.Distance.COSINE)
+    )
+
+    texts, doc_ids = [], []
+    for doc_id, passage in enumerate(passages):
+        for chunk in chunk_words(passage, window, overlap):
+            texts.append(chunk)
+            doc_ids.append(doc_id)
+
+    start = time.perf_counter()
+    embed_seconds = 0.0
+    for offset in range(0, len(texts), batch_size):
+        batch = texts[offset:offset + batch_size]
+        embed_start = time.perf_counter()
+        vectors = [v.tolist() for v in model.embed(batch, batch_size=batch_size)]
+        embed_seconds += time.perf_counter() - embed_start
+        client.upsert(collection_name=name, points=[
+            models.PointStruct(id=offset + i, vector=vector, payload={"doc": doc_ids[offset + i]})
+            for i, vector in enumerate(vectors)
+        ])
+    elapsed = time.perf_counter() - start
+    return {
+        "points": len(texts),
+        "seconds": elapsed,
+        "docs_per_s": len(passages) / elapsed,
+        "embed_share": embed_seconds / elapsed,
+    }
+
+
+def evaluate(client: QdrantClient, name: str, model, queries: list, k: int) -> dict:
+    found = {position: 0 for position in POSITIONS}
+    totals = {position: 0 for position in POSITIONS}
+    latencies = []
+    vectors = [v.tolist() for v in model.embed([q for _, _, q in queries])]
+
+    for (doc_id, position, _), vector in zip(queries, vectors):
+        start = time.perf_counter()
+        groups = client.search_groups(
+            collection_name=name,
+            query_vector=vector,
+            group_by="doc",
+            limit=k,
+            group_size=1
+        )
+        latencies.append((time.perf_counter() - start) * 1000)
+        totals[position] += 1
+        found[position] += doc_id in {group.id for group in groups.groups}
+
+    result = {position: found[position] / totals[position] for position in POSITIONS}
+    result["all"] = sum(found.values()) / sum(totals.values())
+    result["p50_ms"] = float(np.percentile(latencies, 50))
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--docs", type=int, default=300)
+    parser.add_argument("--words", type=int, default=700)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--window", type=int, default=256)
+    parser.add_argument("--overlap", type=int, default=48)
+    parser.add_argument("--batch-size", type=int, default=256)
+    parser.add_argument("--model", default="BAAI/bge-small-en-v1.5")
+    parser.add_argument("--hashing", action="store_true", help="offline hashing embedder instead of --model")
+    parser.add_argument("--url", default=None, help="Qdrant server (default: in-memory local client)")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    if args.hashing:
+        model = HashingEmbedding()
+    else:
+        from fastembed import TextEmbedding
+        model = TextEmbedding(model_name=args.model)
+
+    client = QdrantClient(url=args.url) if args.url else QdrantClient(location=":memory:")
+    passages, queries = make_corpus(args.docs, args.words, args.seed)
+    print(f"{args.docs} passages of ~{args.words} words, {len(queries)} queries, recall@{args.k}")
+    print(f"{'index':<22}{'points':>8}{'docs/s':>9}{'embed%':>8}{'start':>8}{'middle':>8}{'end':>8}{'all':>8}{'p50 ms':>8}")
+
+    variants = [("single vector", 0, 0), (f"chunks {args.window}/{args.overlap}", args.window, args.overlap)]
+    for label, window, overlap in variants:
+        name = f"bench_chunking_{window}"
+        build = build_index(client, name, model, passages, window, overlap, args.batch_size)
+        r = evaluate(client, name, model, queries, args.k)
+        print(
+            f"{label:<22}{build['points']:>8}{build['docs_per_s']:>9.1f}{build['embed_share'] * 100:>7.0f}%"
+            f"{r['start']:>8.2f}{r['middle']:>8.2f}{r['end']:>8.2f}{r['all']:>8.2f}{r['p50_ms']:>8.2f}"
+        )
+        client.delete_collection(name)
+
+
+if __name__ == "__main__":
+    main()
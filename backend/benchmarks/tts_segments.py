@@ -0,0 +1,93 @@
+"""
+Wall-clock TTS time for a full passage: one serial engine call vs.
+sentence-segmented synthesis at different fan-outs.
+
+    python benchmarks/tts_segments.py
+    python benchmarks/tts_segments.py --connect-ms 400 --realtime-factor 6 --fanout 1 2 4 8
+
+Runs against the offline TTS engine: each call pays a connection/first-byte
+latency, then streams silent MPEG-2 Layer III frames at a fixed multiple of
+real time, sized to a ~15 characters per second speaking rate. No network is
+used. The segmented runs must produce the same frame count at every
+fan-out, which checks the frame-accurate join. The single call can differ
+slightly (e.g. 12696 vs 12675 frames): the engine rounds each segment's
+length to whole frames, so the sum differs from rounding the whole passage.
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.config import settings
+from app.services.tts_engines import OfflineTTSEngine
+from app.services.tts_service import TTSService
+from app.utils.mp3 import duration, iter_frames
+
+SENTENCES = [
+    "You stand at the threshold of a season that already recognizes your name.",
+    "Every breath you take settles you deeper into calm, certain confidence.",
+    "Your past achievements glow like lanterns along the path you now walk.",
+    "The discipline you practice today becomes the freedom you live tomorrow.",
+    "You meet each challenge as the forging fire that tempers your character.",
+    "Like flowing water, you find a way forward with patience and grace.",
+    "Your goals are unfolding now, woven into the rhythm of your ordinary days.",
+    "Momentum gathers behind you, quiet and unstoppable, carrying you onward.",
+]
+
+
+def make_passage(words: int) -> str:
+    sentences = []
+    while sum(len(s.split()) for s in sentences) < words:
+        sentences.append(SENTENCES[len(sentences) % len(SENTENCES)])
+    return " ".join(sentences)
+
+
+async def timed(coro) -> tuple:
+    start = time.perf_counter()
+    audio = await coro
+    return audio, time.perf_counter() - start
+
+
+async def run(args) -> None:
+    # Session cap well above any fan-out, so only TTS_SEGMENT_CONCURRENCY limits a run
+    engine = OfflineTTSEngine(
+        connect_ms=args.connect_ms,
+        realtime_factor=args.realtime_factor,
+        max_concurrency=64,
+        timeout=600.0
+    )
+    service = TTSService(engine)
+    passage = make_passage(args.words)
+    settings.TTS_SEGMENT_MAX_CHARS = args.segment_chars
+
+    audio, baseline = await timed(service._synthesize_segment(passage, service.voice_for("tamil")))
+    frames = sum(1 for _ in iter_frames(audio))
+    print(
+        f"{args.words} words, {len(passage)} chars -> {duration(audio):.1f}s of audio ({frames} frames); "
+        f"connect {args.connect_ms:.0f} ms, {args.realtime_factor}x real time, segments <= {args.segment_chars} chars"
+    )
+    print(f"{'mode':<22}{'wall s':>9}{'speedup':>9}{'frames':>9}")
+    print(f"{'single call':<22}{baseline:>9.2f}{1.0:>9.1f}{frames:>9}")
+
+    for fanout in args.fanout:
+        settings.TTS_SEGMENT_CONCURRENCY = fanout
+        audio, seconds = await timed(service.synthesize(passage, "tamil"))
+        segment_frames = sum(1 for _ in iter_frames(audio))
+        print(f"{f'segments, fan-out {fanout}':<22}{seconds:>9.2f}{baseline / seconds:>9.1f}{segment_frames:>9}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--words", type=int, default=700)
+    parser.add_argument("--connect-ms", type=float, default=300.0)
+    parser.add_argument("--realtime-factor", type=float, default=8.0, help="audio seconds synthesized per wall second")
+    parser.add_argument("--segment-chars", type=int, default=settings.TTS_SEGMENT_MAX_CHARS)
+    parser.add_argument("--fanout", type=int, nargs="+", default=[1, 2, 4, 8])
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+"""
+Recall vs. latency for the vector index settings, on a synthetic corpus.
+
+    python benchmarks/vector_index.py --url http://localhost:6333
+    python benchmarks/vector_index.py --points 50000 --quantization none scalar binary --ef 32 64 128 256
+
+Vectors are clustered 384-d unit vectors (the shape of bge-small embeddings),
+so no embedding model is needed. Exact top-k from numpy is the ground truth.
+Without --url the in-memory local client is used; it always searches
+exhaustively, so only a Qdrant server shows the real HNSW/quantization trade-off.
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from qdrant_client import QdrantClient
+from qdrant_client.http import models
+
+from app.services.vector_store import VECTOR_SIZE, build_quantization_config, build_search_params
+
+
+def make_corpus(points: int, queries: int, clusters: int, seed: int):
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(clusters, VECTOR_SIZE)).astype(np.float32)
+    corpus = centers[rng.integers(clusters, size=points)] + rng.normal(scale=0.6, size=(points, VECTOR_SIZE)).astype(np.float32)
+    corpus /= np.linalg.norm(corpus, axis=1, keepdims=True)
+
+    # Queries are perturbed corpus points, like a search phrased close to a stored passage
+    picks = corpus[rng.integers(points, size=queries)]
+    query_vectors = picks + rng.normal(scale=0.05, size=picks.shape).astype(np.float32)
+    query_vectors /= np.linalg.norm(query_vectors, axis=1, keepdims=True)
+    return corpus, query_vectors
+
+
+def exact_top_k(corpus: np.ndarray, queries: np.ndarray, k: int) -> list:
+    scores = queries @ corpus.T
+    return [set(np.argpartition(-row, k)[:k].tolist()) for row in scores]
+
+
+def wait_until_indexed(client: QdrantClient, name: str, timeout: float = 600.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if client.get_collection(name).status == models.CollectionStatus.GREEN:
+            return
+        time.sleep(0.5)
+    raise TimeoutError(f"'{name}' still indexing after {timeout}s")
+
+
+def build_collection(client: QdrantClient, name: str, corpus: np.ndarray, args, quantization: str) -> float:
+    client.recreate_collection(
+        collection_name=name,
+        vectors_config=models.VectorParams(
+            size=VECTOR_SIZE,
+            distance=models.Distance.COSINE,
+            on_disk=args.on_disk
+        ),
+        hnsw_config=models.HnswConfigDiff(m=args.m, ef_construct=args.ef_construct),
+        quantization_config=build_quantization_config(quantization),
+        # Index right away instead of waiting for the default 20k-vector threshold
+        optimizers_config=models.OptimizersConfigDiff(indexing_threshold=1000)
+    )
+    start = time.perf_counter()
+    client.upload_collection(collection_name=name, vectors=corpus, ids=range(len(corpus)), batch_size=512, parallel=1)
+    wait_until_indexed(client, name)
+    return time.perf_counter() - start
+
+
+def run(client: QdrantClient, name: str, queries: np.ndarray, truth: list, k: int, params) -> dict:
+    latencies = []
+    hits = 0
+    for vector, expected in zip(queries, truth):
+        start = time.perf_counter()
+        result = client.search(
+            collection_name=name,
+            query_vector=vector.tolist(),
+            search_params=params,
+            limit=k,
+            with_payload=False
+        )
+        latencies.append((time.perf_counter() - start) * 1000)
+        hits += len(expected & {point.id for point in result})
+
+    latencies = np.array(latencies)
+    return {
+        "recall": hits / (k * len(truth)),
+        "p50": float(np.percentile(latencies, 50)),
+        "p95": float(np.percentile(latencies, 95)),
+        "qps": len(latencies) / (latencies.sum() / 1000),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default=None, help="Qdrant server (default: in-memory local client)")
+    parser.add_argument("--api-key", default=None)
+    parser.add_argument("--points", type=int, default=20000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--clusters", type=int, default=64)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--m", type=int, default=16)
+    parser.add_argument("--ef-construct", type=int, default=100)
+    parser.add_argument("--ef", type=int, nargs="+", default=[32, 64, 128, 256])
+    parser.add_argument("--quantization", nargs="+", default=["none", "scalar", "binary"])
+    parser.add_argument("--oversampling", type=float, default=2.0)
+    parser.add_argument("--on-disk", action="store_true")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    client = QdrantClient(url=args.url, api_key=args.api_key) if args.url else QdrantClient(location=":memory:")
+    corpus, queries = make_corpus(args.points, args.queries, args.clusters, args.seed)
+    truth = exact_top_k(corpus, queries, args.k)
+
+    print(f"{args.points} points, {args.queries} queries, top-{args.k}, m={args.m}, ef_construct={args.ef_construct}")
+    print(f"{'quantization':<13}{'rescore':<9}{'ef':>5}{'recall':>9}{'p50 ms':>9}{'p95 ms':>9}{'qps':>9}")
+
+    for quantization in args.quantization:
+        name = f"bench_{quantization}"
+        build_seconds = build_collection(client, name, corpus, args, quantization)
+        print(f"-- {quantization}: upload + index {build_seconds:.1f}s")
+
+        rescore_options = [False, True] if quantization != "none" else [False]
+        for rescore in rescore_options:
+            for ef in args.ef:
+                params = build_search_params(
+                    hnsw_ef=ef,
+                    quantized=quantization != "none",
+                    rescore=rescore,
+                    oversampling=args.oversampling
+                )
+                r = run(client, name, queries, truth, args.k, params)
+                print(
+                    f"{quantization:<13}{str(rescore):<9}{ef:>5}"
+                    f"{r['recall']:>9.3f}{r['p50']:>9.2f}{r['p95']:>9.2f}{r['qps']:>9.0f}"
+                )
+        client.delete_collection(name)
+
+
+if __name__ == "__main__":
+    main()
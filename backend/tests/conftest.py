@@ -0,0 +1,11 @@
+import os
+import sys
+
+# Settings() needs these at import time; tests never touch a real database or provider
+os.environ.setdefault("POSTGRES_SERVER", "localhost")
+os.environ.setdefault("POSTGRES_USER", "postgres")
+os.environ.setdefault("POSTGRES_PASSWORD", "postgres")
+os.environ.setdefault("POSTGRES_DB", "envision_ai_test")
+os.environ.setdefault("HF_API_TOKEN", "test-token")
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
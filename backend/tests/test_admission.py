@@ -0,0 +1,132 @@
+import asyncio
+
+import pytest
+
+from app.utils.admission import (
+    AdmissionController,
+    PRIORITY_BATCH,
+    PRIORITY_INTERACTIVE,
+    QueueFullError,
+)
+
+
+async def _queued(controller: AdmissionController, count: int) -> None:
+    while controller.queue_depth < count:
+        await asyncio.sleep(0)
+
+
+def test_waiters_are_served_by_priority_then_arrival():
+    controller = AdmissionController(max_concurrency=1, max_queue=10, queue_timeout=5)
+    order = []
+
+    async def request(name, priority):
+        await controller.acquire(priority)
+        order.append(name)
+        controller.release()
+
+    async def scenario():
+        await controller.acquire()
+        tasks = []
+        for name, priority in (("batch", PRIORITY_BATCH), ("first", PRIORITY_INTERACTIVE), ("second", PRIORITY_INTERACTIVE)):
+            tasks.append(asyncio.create_task(request(name, priority)))
+            await _queued(controller, len(tasks))
+        controller.release()
+        await asyncio.gather(*tasks)
+
+    asyncio.run(scenario())
+
+    assert order == ["first", "second", "batch"]
+    assert controller.in_flight == 0
+
+
+def test_full_queue_rejects_immediately():
+    controller = AdmissionController(max_concurrency=1, max_queue=1, queue_timeout=5)
+
+    async def scenario():
+        await controller.acquire()
+        waiter = asyncio.create_task(controller.acquire())
+        await _queued(controller, 1)
+
+        with pytest.raises(QueueFullError) as excinfo:
+            await controller.acquire()
+
+        controller.release()
+        await waiter
+        controller.release()
+        return excinfo.value
+
+    error = asyncio.run(scenario())
+
+    assert error.retry_after >= 1
+    assert controller.stats()["rejected"] == 1
+    assert controller.in_flight == 0
+
+
+def test_wait_times_out_and_leaves_the_queue():
+    controller = AdmissionController(max_concurrency=1, max_queue=5, queue_timeout=0.05)
+
+    async def scenario():
+        await controller.acquire()
+        with pytest.raises(QueueFullError):
+            await controller.acquire()
+        controller.release()
+
+    asyncio.run(scenario())
+
+    assert controller.stats()["timed_out"] == 1
+    assert controller.queue_depth == 0
+    assert controller.in_flight == 0
+
+
+def test_cancelled_waiter_passes_its_slot_on():
+    controller = AdmissionController(max_concurrency=1, max_queue=5, queue_timeout=5)
+
+    async def scenario():
+        await controller.acquire()
+        cancelled = asyncio.create_task(controller.acquire())
+        await _queued(controller, 1)
+        waiting = asyncio.create_task(controller.acquire())
+        await _queued(controller, 2)
+
+        # Hand the slot to the first waiter, then cancel it before it resumes
+        controller.release()
+        cancelled.cancel()
+        try:
+            await cancelled
+        except asyncio.CancelledError:
+            pass
+        else:
+            # wait_for may deliver the slot instead of the cancellation
+            controller.release()
+
+        await asyncio.wait_for(waiting, timeout=1)
+        controller.release()
+
+    asyncio.run(scenario())
+
+    assert controller.in_flight == 0
+    assert controller.queue_depth == 0
+
+
+def test_cancelled_waiter_leaves_the_queue():
+    controller = AdmissionController(max_concurrency=1, max_queue=5, queue_timeout=5)
+
+    async def scenario():
+        await controller.acquire()
+        cancelled = asyncio.create_task(controller.acquire())
+        waiting = asyncio.create_task(controller.acquire())
+        await _queued(controller, 2)
+
+        cancelled.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await cancelled
+        assert controller.queue_depth == 1
+
+        controller.release()
+        await asyncio.wait_for(waiting, timeout=1)
+        controller.release()
+
+    asyncio.run(scenario())
+
+    assert controller.in_flight == 0
+    assert controller.queue_depth == 0
@@ -0,0 +1,63 @@
+import asyncio
+import threading
+
+import pytest
+
+from app.services.embedding_batcher import EmbeddingBatcher
+
+
+def fake_embed(texts: list) -> list:
+    return [[float(len(text))] for text in texts]
+
+
+def test_concurrent_submits_share_one_batch():
+    batcher = EmbeddingBatcher(fake_embed, max_batch_size=8, max_wait_ms=50)
+    try:
+        futures = [batcher.submit("x" * n) for n in range(1, 5)]
+        assert [future.result(timeout=5) for future in futures] == [[1.0], [2.0], [3.0], [4.0]]
+        assert batcher.stats()["batches"] == 1
+    finally:
+        batcher.close()
+
+
+def test_cancelled_caller_does_not_kill_the_thread():
+    release = threading.Event()
+
+    def blocking_embed(texts: list) -> list:
+        release.wait(5)
+        return fake_embed(texts)
+
+    batcher = EmbeddingBatcher(blocking_embed, max_batch_size=1, max_wait_ms=0)
+
+    async def run():
+        busy = asyncio.wrap_future(batcher.submit("a")) # occupies the thread
+        cancelled = asyncio.ensure_future(asyncio.wrap_future(batcher.submit("bb")))
+        await asyncio.sleep(0.05)
+        cancelled.cancel() # cancels the queued concurrent future too
+        await asyncio.sleep(0)
+        release.set()
+        return await busy, await asyncio.wrap_future(batcher.submit("ccc"))
+
+    try:
+        assert asyncio.run(asyncio.wait_for(run(), 5)) == ([1.0], [3.0])
+        assert batcher.stats()["cancelled"] == 1
+    finally:
+        batcher.close()
+
+
+def test_failing_embed_fn_fails_the_batch_only():
+    calls = []
+
+    def flaky_embed(texts: list) -> list:
+        calls.append(texts)
+        if len(calls) == 1:
+            raise RuntimeError("onnx exploded")
+        return fake_embed(texts)
+
+    batcher = EmbeddingBatcher(flaky_embed, max_batch_size=4, max_wait_ms=0)
+    try:
+        with pytest.raises(RuntimeError, match="onnx exploded"):
+            batcher.submit("a").result(timeout=5)
+        assert batcher.submit("bb").result(timeout=5) == [2.0]
+    finally:
+        batcher.close()
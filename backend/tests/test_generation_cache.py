@@ -0,0 +1,85 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from app.services import generation_cache as cache_module
+from app.services import manifestation_service
+from app.services.generation_cache import GenerationCache
+
+
+def test_key_ignores_whitespace_and_field_order():
+    a = GenerationCache.make_key({"preferred_name": "Asha", "life_goals": "Build  a\n school"})
+    b = GenerationCache.make_key({"life_goals": " Build a school ", "preferred_name": "Asha"})
+    c = GenerationCache.make_key({"preferred_name": "Asha", "life_goals": "Build a hospital"})
+
+    assert a == b
+    assert a != c
+
+
+def test_entries_expire_after_ttl(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(cache_module.time, "monotonic", lambda: now[0])
+    cache = GenerationCache(max_entries=8, ttl_seconds=60)
+
+    asyncio.run(cache.set("k", "passage"))
+    now[0] += 59
+    assert asyncio.run(cache.get("k")) == "passage"
+    now[0] += 2
+    assert asyncio.run(cache.get("k")) is None
+    assert cache.stats()["entries"] == 0
+
+
+class FailingSession:
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def execute(self, statement):
+        raise RuntimeError("duplicate key value violates unique constraint")
+
+
+def test_persistent_write_failure_does_not_raise():
+    cache = GenerationCache(max_entries=8, ttl_seconds=60, persistent=True, session_factory=FailingSession)
+
+    asyncio.run(cache.set("k", "passage"))
+
+    assert cache.stats()["write_errors"] == 1
+    assert asyncio.run(cache.get("k")) == "passage"
+
+
+@pytest.fixture
+def fresh_cache(monkeypatch):
+    cache = GenerationCache(max_entries=8, ttl_seconds=60)
+    monkeypatch.setattr(manifestation_service, "generation_cache", cache)
+    monkeypatch.setattr(manifestation_service.settings, "GENERATION_CACHE_ENABLED", True)
+    calls = []
+
+    async def generate(profile, priority=None):
+        calls.append(profile)
+        return f"passage {len(calls)}"
+
+    monkeypatch.setattr(manifestation_service.llm_service, "generate_manifestation", generate)
+    return cache, calls
+
+
+def test_opted_out_user_always_gets_a_fresh_passage(fresh_cache):
+    cache, calls = fresh_cache
+    profile = {"preferred_name": "Asha"}
+    opted_in = SimpleNamespace(id=1, generation_cache_enabled=True)
+    opted_out = SimpleNamespace(id=2, generation_cache_enabled=False)
+
+    async def scenario():
+        first = await manifestation_service.generate_text(None, opted_in, profile)
+        again = await manifestation_service.generate_text(None, opted_in, profile)
+        fresh = await manifestation_service.generate_text(None, opted_out, profile)
+        return first, again, fresh
+
+    first, again, fresh = asyncio.run(scenario())
+
+    assert first == ("passage 1", False)
+    assert again == ("passage 1", True)
+    assert fresh == ("passage 2", False)
+    assert cache.stats()["entries"] == 1
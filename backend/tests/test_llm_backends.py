@@ -0,0 +1,50 @@
+import asyncio
+
+import httpx
+import pytest
+
+from app.services import fake_llm_server
+from app.services.llm_backends import FakeBackend, OpenAICompatibleBackend, UpstreamError
+
+PAYLOAD = {"model": "fake-llm", "messages": [{"role": "user", "content": "hi"}]}
+
+
+def instant_fake(**kwargs) -> FakeBackend:
+    return FakeBackend(ttfb_median_ms=0, tokens_per_second=0, seed=7, **kwargs)
+
+
+def test_fake_backend_produces_realistic_length():
+    text = asyncio.run(instant_fake(words=700).complete(PAYLOAD, lambda: None))
+
+    assert 650 <= len(text.split()) <= 750
+
+
+def test_fake_backend_stream_matches_word_count():
+    async def collect():
+        return "".join([delta async for delta in instant_fake(words=100).stream(PAYLOAD)])
+
+    assert 93 <= len(asyncio.run(collect()).split()) <= 107
+
+
+def test_fake_backend_injects_errors():
+    with pytest.raises(UpstreamError) as exc:
+        asyncio.run(instant_fake(error_rate=1.0, error_status=429).complete(PAYLOAD, lambda: None))
+
+    assert exc.value.status_code == 429
+    assert exc.value.retryable
+
+
+def test_openai_backend_against_fake_server(monkeypatch):
+    monkeypatch.setattr(fake_llm_server, "fake", instant_fake(words=50))
+    client = httpx.AsyncClient(transport=httpx.ASGITransport(app=fake_llm_server.app))
+    backend = OpenAICompatibleBackend("http://fake/v1", "", "fake-llm", lambda: client)
+
+    async def run():
+        text = await backend.complete(PAYLOAD, lambda: None)
+        streamed = "".join([delta async for delta in backend.stream(dict(PAYLOAD, stream=True))])
+        return text, streamed
+
+    text, streamed = asyncio.run(run())
+
+    assert len(text.split()) >= 45
+    assert len(streamed.split()) >= 45
@@ -0,0 +1,183 @@
+import asyncio
+import time
+
+import httpx
+import pytest
+
+from app.core.config import settings
+from app.services import llm_service
+from app.services.llm_backends import FakeBackend
+from app.utils.admission import AdmissionController, QueueFullError
+from app.utils.circuit_breaker import CircuitBreaker, CircuitOpenError
+
+PROFILE = {"preferred_name": "Jane", "life_goals": "Live by the ocean"}
+
+
+def completion(text: str) -> dict:
+    return {"choices": [{"message": {"role": "assistant", "content": text}}]}
+
+
+class FakeProvider:
+    """
+    Local stand-in for the chat-completions endpoint.
+    `script` is consumed one entry per call: an int status, or (delay_s, status).
+    """
+
+    def __init__(self, script):
+        self.script = list(script)
+        self.calls = 0
+
+    async def __call__(self, request: httpx.Request) -> httpx.Response:
+        self.calls += 1
+        step = self.script.pop(0) if self.script else 200
+        delay, status = step if isinstance(step, tuple) else (0, step)
+        if delay:
+            await asyncio.sleep(delay)
+        if status == 200:
+            return httpx.Response(200, json=completion(f"passage {self.calls}"))
+        return httpx.Response(status, json={"error": "boom"})
+
+
+@pytest.fixture
+def provider(monkeypatch):
+    def install(script):
+        fake = FakeProvider(script)
+        monkeypatch.setattr(llm_service, "_client", httpx.AsyncClient(transport=httpx.MockTransport(fake)))
+        return fake
+
+    monkeypatch.setattr(settings, "LLM_RETRY_BASE_DELAY", 0.0)
+    monkeypatch.setattr(settings, "LLM_MAX_RETRIES", 3)
+    monkeypatch.setattr(settings, "LLM_HEDGE_ENABLED", False)
+    monkeypatch.setattr(llm_service, "breaker", CircuitBreaker(failure_threshold=3, reset_timeout=60))
+    monkeypatch.setattr(llm_service, "admission", AdmissionController(4, 4, queue_timeout=5))
+    monkeypatch.setattr(llm_service, "_ttfb_samples", llm_service.deque(maxlen=200))
+    return install
+
+
+def test_retries_retryable_status_then_succeeds(provider):
+    fake = provider([503, 429, 200])
+
+    text = asyncio.run(llm_service.generate_manifestation(PROFILE))
+
+    assert text == "passage 3"
+    assert fake.calls == 3
+
+
+def test_does_not_retry_client_errors(provider):
+    fake = provider([400])
+
+    with pytest.raises(llm_service.UpstreamError) as exc:
+        asyncio.run(llm_service.generate_manifestation(PROFILE))
+
+    assert exc.value.status_code == 400
+    assert fake.calls == 1
+    assert llm_service.breaker.state == "closed"
+
+
+def test_gives_up_after_max_retries(provider, monkeypatch):
+    monkeypatch.setattr(llm_service, "breaker", CircuitBreaker(failure_threshold=10, reset_timeout=60))
+    fake = provider([502] * 10)
+
+    with pytest.raises(llm_service.UpstreamError):
+        asyncio.run(llm_service.generate_manifestation(PROFILE))
+
+    assert fake.calls == settings.LLM_MAX_RETRIES + 1
+
+
+def test_circuit_opens_and_fails_fast(provider, monkeypatch):
+    monkeypatch.setattr(settings, "LLM_MAX_RETRIES", 0)
+    fake = provider([503] * 10)
+
+    for _ in range(3):
+        with pytest.raises(llm_service.UpstreamError):
+            asyncio.run(llm_service.generate_manifestation(PROFILE))
+
+    with pytest.raises(CircuitOpenError):
+        asyncio.run(llm_service.generate_manifestation(PROFILE))
+    assert fake.calls == 3
+    assert llm_service.breaker.state == "open"
+
+
+def test_hedge_wins_when_primary_is_slow(provider, monkeypatch):
+    monkeypatch.setattr(settings, "LLM_HEDGE_ENABLED", True)
+    monkeypatch.setattr(settings, "LLM_HEDGE_MIN_DELAY", 0.05)
+    monkeypatch.setattr(settings, "LLM_HEDGE_MIN_SAMPLES", 5)
+    fake = provider([(2.0, 200), 200])
+    llm_service._ttfb_samples.extend([0.01] * 5)
+    hedges_won = llm_service.hedge_stats["won"]
+
+    text = asyncio.run(llm_service.generate_manifestation(PROFILE))
+
+    assert text == "passage 2"
+    assert fake.calls == 2
+    assert llm_service.hedge_stats["won"] == hedges_won + 1
+
+
+def test_no_hedge_without_enough_samples(provider, monkeypatch):
+    monkeypatch.setattr(settings, "LLM_HEDGE_ENABLED", True)
+    provider([200])
+
+    assert llm_service.hedge_delay() is None
+
+
+def test_circuit_opens_mid_retry_loop(provider):
+    fake = provider([502] * 10)
+
+    with pytest.raises(CircuitOpenError):
+        asyncio.run(llm_service.generate_manifestation(PROFILE))
+
+    assert fake.calls == 3
+
+
+def reopen_for_trial(breaker: CircuitBreaker) -> None:
+    # Open, with the reset timeout already elapsed: the next call is the half-open trial
+    breaker.state = "open"
+    breaker._opened_at = time.monotonic() - breaker.reset_timeout - 1
+
+
+def test_trial_released_when_call_is_not_admitted(provider, monkeypatch):
+    provider([200])
+    monkeypatch.setattr(llm_service, "admission", AdmissionController(1, 0, queue_timeout=5))
+    reopen_for_trial(llm_service.breaker)
+
+    async def run():
+        await llm_service.admission.acquire() # hold the only slot
+        with pytest.raises(QueueFullError):
+            await llm_service.generate_manifestation(PROFILE)
+        llm_service.admission.release()
+        return await llm_service.generate_manifestation(PROFILE)
+
+    assert asyncio.run(run()) == "passage 1"
+    assert llm_service.breaker.state == "closed"
+
+
+def test_trial_released_when_stream_is_abandoned(provider, monkeypatch):
+    provider([])
+    monkeypatch.setattr(llm_service, "backend", FakeBackend(ttfb_median_ms=0, tokens_per_second=0, seed=1))
+    reopen_for_trial(llm_service.breaker)
+
+    async def run():
+        stream = llm_service.stream_manifestation(PROFILE)
+        await stream.__anext__()
+        await stream.aclose() # client disconnected mid-passage
+        return await llm_service.generate_manifestation(PROFILE)
+
+    assert asyncio.run(run())
+    assert llm_service.breaker.state == "closed"
+    assert llm_service.admission.in_flight == 0
+
+
+def test_hedge_skipped_without_a_free_slot(provider, monkeypatch):
+    monkeypatch.setattr(settings, "LLM_HEDGE_ENABLED", True)
+    monkeypatch.setattr(settings, "LLM_HEDGE_MIN_DELAY", 0.05)
+    monkeypatch.setattr(settings, "LLM_HEDGE_MIN_SAMPLES", 5)
+    monkeypatch.setattr(llm_service, "admission", AdmissionController(1, 4, queue_timeout=5))
+    fake = provider([(0.2, 200), 200])
+    llm_service._ttfb_samples.extend([0.01] * 5)
+    skipped = llm_service.hedge_stats["skipped"]
+
+    text = asyncio.run(llm_service.generate_manifestation(PROFILE))
+
+    assert text == "passage 1"
+    assert fake.calls == 1
+    assert llm_service.hedge_stats["skipped"] == skipped + 1
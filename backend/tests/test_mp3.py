@@ -0,0 +1,29 @@
+from app.utils.mp3 import duration, iter_frames, join_frames, parse_frame_header
+
+# MPEG-2 Layer III, 48 kbps, 24 kHz, mono: 144 bytes, 24 ms
+FRAME = bytes([0xFF, 0xF3, 0x64, 0xC4]) + bytes(140)
+
+
+def id3v2(body: bytes) -> bytes:
+    size = len(body)
+    syncsafe = bytes([(size >> 21) & 0x7F, (size >> 14) & 0x7F, (size >> 7) & 0x7F, size & 0x7F])
+    return b"ID3\x04\x00\x00" + syncsafe + body
+
+
+def test_parses_mpeg2_layer3_header():
+    length, seconds = parse_frame_header(FRAME[:4])
+    assert length == 144
+    assert abs(seconds - 0.024) < 1e-9
+    assert parse_frame_header(b"ID3\x04") is None
+
+
+def test_join_keeps_only_audio_frames_in_order():
+    info = bytes([0xFF, 0xF3, 0x64, 0xC4]) + bytes(9) + b"Info" + bytes(127)
+    first = id3v2(b"\x00" * 30) + info + FRAME * 3 + FRAME[:50] # truncated tail
+    second = b"junk" + FRAME * 2 + b"TAG" + bytes(125) # ID3v1 trailer
+
+    joined = join_frames([first, second])
+
+    assert joined == FRAME * 5
+    assert [offset for offset, _, _ in iter_frames(joined)] == [i * 144 for i in range(5)]
+    assert abs(duration(joined) - 0.12) < 1e-9
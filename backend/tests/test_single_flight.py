@@ -0,0 +1,73 @@
+import asyncio
+
+import pytest
+
+from app.utils.single_flight import SingleFlight
+
+
+def test_concurrent_calls_share_one_task():
+    flight = SingleFlight()
+    calls = []
+
+    async def work(value):
+        calls.append(value)
+        await asyncio.sleep(0.01)
+        return value * 2
+
+    async def scenario():
+        return await asyncio.gather(*(flight.do("k", work, 21) for _ in range(5)))
+
+    assert asyncio.run(scenario()) == [42] * 5
+    assert calls == [21]
+    assert flight.stats() == {"in_flight": 0, "started": 1, "coalesced": 4}
+
+
+def test_cancelled_caller_does_not_cancel_the_work():
+    flight = SingleFlight()
+    release = None
+    finished = []
+
+    async def work():
+        await release.wait()
+        finished.append(True)
+        return "passage"
+
+    async def scenario():
+        nonlocal release
+        release = asyncio.Event()
+        leaving = asyncio.create_task(flight.do("k", work))
+        staying = asyncio.create_task(flight.do("k", work))
+        await asyncio.sleep(0)
+
+        leaving.cancel()
+        await asyncio.sleep(0)
+        release.set()
+
+        with pytest.raises(asyncio.CancelledError):
+            await leaving
+        return await staying
+
+    assert asyncio.run(scenario()) == "passage"
+    assert finished == [True]
+
+
+def test_exception_reaches_every_caller_and_is_not_kept():
+    flight = SingleFlight()
+    calls = []
+
+    async def work():
+        calls.append(True)
+        await asyncio.sleep(0.01)
+        raise RuntimeError("upstream down")
+
+    async def scenario():
+        results = await asyncio.gather(*(flight.do("k", work) for _ in range(3)), return_exceptions=True)
+        retry = await asyncio.gather(flight.do("k", work), return_exceptions=True)
+        return results, retry
+
+    results, retry = asyncio.run(scenario())
+
+    assert [str(e) for e in results] == ["upstream down"] * 3
+    assert isinstance(retry[0], RuntimeError)
+    assert len(calls) == 2
+    assert flight.stats()["in_flight"] == 0
@@ -0,0 +1,39 @@
+from app.utils.text_chunker import SentenceBuffer, chunk_words, segment_sentences, split_sentences
+
+
+def test_short_text_is_one_chunk():
+    assert chunk_words("one two three", 256, 48) == ["one two three"]
+    assert chunk_words("one two three", 0, 0) == ["one two three"]
+
+
+def test_windows_overlap_and_cover_every_word():
+    words = [str(i) for i in range(700)]
+    chunks = [chunk.split() for chunk in chunk_words(" ".join(words), 256, 48)]
+
+    assert all(len(chunk) == 256 for chunk in chunks)
+    assert chunks[0][0] == "0" and chunks[-1][-1] == "699"
+    for previous, current in zip(chunks, chunks[1:]):
+        assert len(set(previous) & set(current)) >= 48
+    assert sorted({word for chunk in chunks for word in chunk}, key=int) == words
+
+
+def test_segments_break_at_sentence_boundaries():
+    text = "One two three. Four five six! Seven eight nine? Ten."
+    segments = segment_sentences(text, 30)
+
+    assert segments == ["One two three. Four five six!", "Seven eight nine? Ten."]
+    assert " ".join(segments) == text
+    assert segment_sentences("A very long single sentence without a break.", 10) == [
+        "A very long single sentence without a break."
+    ]
+
+
+def test_sentence_buffer_matches_split_sentences():
+    text = "You rise at 5.30 each day. Calm fills you... and it stays! Do you feel it? You do"
+    buffer = SentenceBuffer()
+    sentences = []
+    for i in range(0, len(text), 3):
+        sentences += buffer.feed(text[i:i + 3])
+    assert sentences == split_sentences(text)[:-1]
+    assert buffer.flush() == ["You do"]
+    assert buffer.flush() == []
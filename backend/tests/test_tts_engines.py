@@ -0,0 +1,48 @@
+import asyncio
+
+import pytest
+
+from app.services.tts_engines import OfflineTTSEngine, TTSTimeoutError
+from app.utils.mp3 import duration
+
+TEXT = "You breathe in calm and breathe out doubt, settling into quiet confidence."
+
+
+def test_offline_engine_speaks_for_a_realistic_duration():
+    engine = OfflineTTSEngine()
+
+    audio = asyncio.run(engine.synthesize(TEXT, "voice-a", rate="-5%"))
+
+    assert abs(duration(audio) - len(TEXT) / (15.0 * 0.95)) < 0.05
+    voice = engine.stats()["voices"]["voice-a"]
+    assert voice["calls"] == 1 and voice["bytes"] == len(audio) and voice["errors"] == 0
+
+
+def test_sessions_are_capped_per_engine():
+    class CountingEngine(OfflineTTSEngine):
+        peak = 0
+
+        async def _stream(self, text, voice, rate, pitch):
+            CountingEngine.peak = max(CountingEngine.peak, self._active)
+            async for chunk in super()._stream(text, voice, rate, pitch):
+                yield chunk
+
+    engine = CountingEngine(connect_ms=20, max_concurrency=2)
+
+    async def run():
+        await asyncio.gather(*(engine.synthesize(TEXT, "voice-a") for _ in range(6)))
+
+    asyncio.run(run())
+    assert CountingEngine.peak == 2
+    assert engine.stats()["in_flight"] == 0
+
+
+def test_timeout_releases_the_session():
+    engine = OfflineTTSEngine(connect_ms=200, timeout=0.05, max_concurrency=1)
+
+    with pytest.raises(TTSTimeoutError):
+        asyncio.run(engine.synthesize(TEXT, "voice-a"))
+
+    stats = engine.stats()
+    assert stats["in_flight"] == 0
+    assert stats["voices"]["voice-a"]["timeouts"] == 1
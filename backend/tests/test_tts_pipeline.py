@@ -0,0 +1,43 @@
+import asyncio
+
+from app.services.tts_service import TTSService
+
+# MPEG-2 Layer III, 48 kbps, 24 kHz, mono: 144 bytes, 24 ms
+FRAME = bytes([0xFF, 0xF3, 0x64, 0xC4]) + bytes(140)
+
+
+class SlowFirstService(TTSService):
+    """
+    Sentence n is n frames long; the first sentence is the slowest to synthesize.
+    """
+
+    async def _synthesize_segment(self, text: str, voice: str) -> bytes:
+        index = int(text.split()[1])
+        await asyncio.sleep(0.05 if index == 1 else 0)
+        return FRAME * index
+
+
+async def deltas(text: str):
+    for i in range(0, len(text), 5):
+        yield text[i:i + 5]
+
+
+def test_speak_releases_audio_in_sentence_order():
+    text = "Sentence 1 here. Sentence 2 here. Sentence 3 here"
+
+    service = SlowFirstService()
+
+    async def run():
+        return [event async for event in service.speak(deltas(text))]
+
+    events = asyncio.run(run())
+    audio = [payload for kind, payload in events if kind == "audio"]
+    kind, (full_text, joined) = events[-1]
+
+    assert "".join(payload for kind, payload in events if kind == "delta") == text
+    assert [(index, sentence) for index, sentence, _ in audio] == [
+        (0, "Sentence 1 here."), (1, "Sentence 2 here."), (2, "Sentence 3 here")
+    ]
+    assert [len(frames) // len(FRAME) for _, _, frames in audio] == [1, 2, 3]
+    assert kind == "done" and full_text == text and joined == FRAME * 6
+    assert service.stats()["spoken"] == 1 and service.stats()["avg_first_audio_ms"] >= 50
@@ -0,0 +1,28 @@
+import pytest
+
+from app.core.config import settings
+from app.services import vector_store
+
+
+def test_embedded_mode_by_default(monkeypatch):
+    monkeypatch.setattr(settings, "QDRANT_URL", "")
+    assert vector_store.qdrant_client_options() == {"path": settings.QDRANT_PATH}
+    vector_store.check_vector_store_deployment(1)
+
+
+def test_embedded_mode_refuses_multiple_workers(monkeypatch):
+    monkeypatch.setattr(settings, "QDRANT_URL", "")
+    with pytest.raises(RuntimeError, match="WEB_CONCURRENCY=4"):
+        vector_store.check_vector_store_deployment(4)
+
+
+def test_server_mode_allows_multiple_workers(monkeypatch):
+    monkeypatch.setattr(settings, "QDRANT_URL", "http://qdrant:6333")
+    monkeypatch.setattr(settings, "QDRANT_API_KEY", "")
+    monkeypatch.setattr(settings, "QDRANT_PREFER_GRPC", True)
+
+    options = vector_store.qdrant_client_options()
+    assert options["url"] == "http://qdrant:6333"
+    assert options["api_key"] is None
+    assert options["prefer_grpc"] is True
+    vector_store.check_vector_store_deployment(4)
@@ -0,0 +1,61 @@
+import asyncio
+import threading
+
+import pytest
+
+from app.core.config import settings
+from app.services import vector_store as vs
+
+
+class FakeModel:
+    """
+    Never embeds anything: startup fails at Qdrant first.
+    """
+
+
+@pytest.fixture
+def dead_qdrant(monkeypatch):
+    loads = []
+
+    def load():
+        loads.append(1)
+        return FakeModel()
+
+    # Nothing listens on the discard port, so every Qdrant call fails fast
+    monkeypatch.setattr(settings, "QDRANT_URL", "http://127.0.0.1:9")
+    monkeypatch.setattr(settings, "QDRANT_TIMEOUT", 2)
+    monkeypatch.setattr(settings, "VECTOR_STORE_RETRY_MIN", 30.0)
+    monkeypatch.setattr(vs, "load_embedding_model", load)
+    for name, value in (("_vector_store", None), ("_embedding_model", None), ("_ready", False),
+                        ("_warmup_error", None), ("_failures", 0), ("_retry_at", 0.0)):
+        monkeypatch.setattr(vs, name, value)
+    monkeypatch.setattr(vs, "_lock", asyncio.Lock())
+    return loads
+
+
+def batcher_threads() -> int:
+    return sum(1 for thread in threading.enumerate() if thread.name == "embedding-batcher" and thread.is_alive())
+
+
+def test_failed_start_backs_off_without_leaking(dead_qdrant):
+    threads_before = batcher_threads()
+
+    async def run():
+        with pytest.raises(Exception) as first:
+            await vs.get_vector_store()
+        assert not isinstance(first.value, vs.VectorStoreUnavailableError)
+
+        for _ in range(3):
+            with pytest.raises(vs.VectorStoreUnavailableError) as backoff:
+                await vs.get_vector_store()
+            assert backoff.value.retry_after > 0
+
+        # Backoff over: the next attempt reuses the loaded model
+        vs._retry_at = 0.0
+        with pytest.raises(Exception):
+            await vs.get_vector_store()
+
+    asyncio.run(run())
+    assert len(dead_qdrant) == 1
+    assert vs._failures == 2
+    assert batcher_threads() == threads_before